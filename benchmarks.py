@@ -0,0 +1,325 @@
+"""
+Banco de pruebas de rendimiento de los patrones del repositorio.
+
+Cada módulo tiene una carga de trabajo reproducible (tamaños fijos, sin aleatoriedad) que
+mide una operación representativa: clonados por segundo en el prototipo, accesos a través del
+proxy, renderizado de un árbol de un millón de nodos en el composite, despacho de cargadores
+en fabrica2, celdas transformadas por segundo en el puente, productos construidos por segundo
+con el constructor de clase_abstracta, etc.
+
+Los resultados se guardan en JSON. Si se indica una referencia (otro JSON de una ejecución
+anterior), se compara cada carga con ella y el programa termina con error cuando alguna es
+más lenta que la referencia en un porcentaje mayor que el umbral configurado.
+
+Uso:
+    python benchmarks.py --salida resultados.json
+    python benchmarks.py --arranque --salida resultados.json
+    python benchmarks.py --referencia resultados.json --umbral 10
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+_cargas = {}
+
+
+def carga(modulo):
+    """Registra una carga de trabajo para el módulo indicado."""
+    def decorador(funcion):
+        _cargas[modulo] = funcion
+        return funcion
+    return decorador
+
+
+def _importar(nombre):
+    return importlib.import_module(nombre)
+
+
+"""
+Cada carga recibe un factor de escala y devuelve el número de operaciones y la función que
+las ejecuta; la preparación de los datos queda fuera de la medida.
+"""
+
+
+@carga('prototipo')
+def _prototipo(escala):
+    prototipo = _importar('prototipo')
+    n = int(100_000 * escala)
+
+    def clonar():
+        # Prototipo anuncia cada clonado por la salida estándar: se descarta para no medir la
+        # escritura en la terminal
+        with open(os.devnull, 'w') as nula, contextlib.redirect_stdout(nula):
+            prototipo.Prototipo()  # la instancia de referencia
+            for _ in range(n):
+                prototipo.Prototipo()
+    return n, clonar
+
+
+@carga('proxy')
+def _proxy(escala):
+    proxy = _importar('proxy')
+    proyeccion = proxy.Proyeccion(proxy.Punto(1, 2, 3))
+    n = int(1_000_000 * escala)
+
+    def acceder():
+        for _ in range(n // 2):
+            proyeccion.x()
+            proyeccion.z()
+    return n // 2 * 2, acceder
+
+
+@carga('composite')
+def _composite(escala):
+    composite = _importar('composite')
+    # árbol completo de grado 10: con profundidad 6 tiene 1.111.111 nodos
+    profundidad = max(1, round(math.log10(1_000_000 * escala)))
+
+    def construir(nombre, nivel):
+        if nivel == profundidad:
+            return composite.Hoja(nombre)
+        nodo = composite.Composite(nombre)
+        nodo.contenido = [construir('%s.%d' % (nombre, i), nivel + 1) for i in range(10)]
+        return nodo
+
+    raiz = construir('C', 0)
+    return (10 ** (profundidad + 1) - 1) // 9, raiz.verbose
+
+
+@carga('fabrica')
+def _fabrica(escala):
+    fabrica = _importar('fabrica')
+    n = int(1_000_000 * escala)
+
+    def despachar():
+        for param in range(n):
+            fabrica.fabrica(param)
+    return n, despachar
+
+
+@carga('fabrica2')
+def _fabrica2(escala):
+    fabrica2 = _importar('fabrica2')
+    nombres = ['datos%d%s' % (i, ext) for i in range(100) for ext in ('.txt', '.csv', '.pckl')]
+    repeticiones = max(1, int(1000 * escala))
+
+    def despachar():
+        for _ in range(repeticiones):
+            for nombre in nombres:
+                fabrica2.Loader(nombre)
+    return repeticiones * len(nombres), despachar
+
+
+@carga('puente')
+def _puente(escala):
+    puente = _importar('puente')
+    filas, columnas = int(100_000 * escala), 10
+    contenido = [['Celda%d' % j for j in range(columnas)] for _ in range(filas)]
+
+    class LoaderMemoria(puente.Loader):
+        def load(self, filename):
+            return [list(fila) for fila in contenido]
+
+    transformer = puente.UpperTransformer('memoria', loader=LoaderMemoria())
+    transformer.loadDatos()
+    return filas * columnas, transformer.transformer
+
+
+@carga('clase_abstracta')
+def _clase_abstracta(escala):
+    clase_abstracta = _importar('clase_abstracta')
+    director = clase_abstracta.Director()
+    constructores = [clase_abstracta.ConstructorCuboAzul(), clase_abstracta.ConstructorEsferaRoja(),
+                     clase_abstracta.ConstructorPiramideVerde()]
+    n = int(300_000 * escala)
+
+    def construir():
+        for i in range(n):
+            director.constructor = constructores[i % 3]
+            director.configurarProducto()
+    return n, construir
+
+
+@carga('decorador')
+def _decorador(escala):
+    decorador = _importar('decorador')
+    n = int(1_000_000 * escala)
+
+    def llamar():
+        for i in range(n):
+            decorador.calcula(i)
+    return n, llamar
+
+
+@carga('patrones_adaptador')
+def _patrones_adaptador(escala):
+    adaptador = _importar('patrones_adaptador')
+    n = int(300_000 * escala)
+    animales = [clase() for clase in (adaptador.Perro, adaptador.Gato,
+                                      adaptador.Caballo, adaptador.Cerdo)] * (n // 4)
+
+    def adaptar():
+        for animal in animales:
+            adaptador.animal_adapterFactory(animal)
+    return len(animales), adaptar
+
+
+@carga('fachada')
+def _fachada(escala):
+    fachada = _importar('fachada')
+    n = int(100_000 * escala)
+
+    def dialogar():
+        for i in range(n):
+            dialog = fachada.Dialog('Plic', 'Ploc')
+            dialog.sentences = ['Nice Factory', 'It works']
+            dialog()
+    return n, dialogar
+
+
+@carga('singletown')
+def _singletown(escala):
+    singletown = _importar('singletown')
+    n = int(1_000_000 * escala)
+
+    def obtener():
+        for _ in range(n):
+            singletown.Singletown()
+    return n, obtener
+
+
+"""
+La ejecución toma, para cada carga, el mejor de varios intentos, con el recolector de basura
+desactivado durante la medida para reducir el ruido.
+"""
+
+
+def ejecutar(modulos=None, escala=1.0, repeticiones=3):
+    resultados = {}
+    for modulo in modulos or sorted(_cargas):
+        try:
+            operaciones, funcion = _cargas[modulo](escala)
+            mejor = None
+            for _ in range(repeticiones):
+                gc.collect()
+                gc.disable()
+                try:
+                    inicio = time.perf_counter()
+                    funcion()
+                    segundos = time.perf_counter() - inicio
+                finally:
+                    gc.enable()
+                mejor = segundos if mejor is None else min(mejor, segundos)
+            resultados[modulo] = {'operaciones': operaciones, 'segundos': mejor,
+                                  'ops_por_segundo': operaciones / mejor}
+        except Exception as error:
+            resultados[modulo] = {'error': '%s: %s' % (type(error).__name__, error)}
+    return {'python': platform.python_version(), 'plataforma': platform.platform(),
+            'escala': escala, 'resultados': resultados}
+
+
+"""
+El tiempo de arranque se mide importando cada módulo en un intérprete nuevo con -X importtime,
+que escribe en stderr el tiempo acumulado (en microsegundos) de cada importación.
+"""
+
+
+def arranque(modulos=None, repeticiones=3):
+    resultados = {}
+    for modulo in modulos or sorted(_cargas):
+        mejor = None
+        for _ in range(repeticiones):
+            proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + modulo],
+                                     capture_output=True, text=True,
+                                     cwd=os.path.dirname(os.path.abspath(__file__)))
+            if proceso.returncode:
+                # sin nada en stderr (por ejemplo, al morir por una señal) queda el código
+                lineas = proceso.stderr.strip().splitlines()
+                resultados[modulo] = {'error': lineas[-1] if lineas
+                                      else 'código %d' % proceso.returncode}
+                break
+            for linea in proceso.stderr.splitlines():
+                campos = linea.split('|')
+                if len(campos) == 3 and campos[2].strip() == modulo:
+                    acumulado = int(campos[1])
+                    mejor = acumulado if mejor is None else min(mejor, acumulado)
+        else:
+            resultados[modulo] = {'microsegundos': mejor}
+    return resultados
+
+
+def comparar(actual, referencia, umbral):
+    """Devuelve las cargas más lentas que la referencia en más de umbral por ciento."""
+    regresiones = {}
+    for modulo, datos in actual['resultados'].items():
+        base = referencia['resultados'].get(modulo, {})
+        if 'ops_por_segundo' not in base:
+            continue
+        if 'ops_por_segundo' not in datos:  # la carga funcionaba y ahora falla
+            perdida = 100.0
+        else:
+            perdida = (base['ops_por_segundo'] - datos['ops_por_segundo']) / base['ops_por_segundo'] * 100
+        if perdida > umbral:
+            regresiones[modulo] = perdida
+    for modulo, datos in actual.get('arranque', {}).items():
+        base = referencia.get('arranque', {}).get(modulo, {})
+        if 'microsegundos' not in base or not base['microsegundos']:
+            continue
+        if 'microsegundos' not in datos:
+            perdida = 100.0
+        else:
+            perdida = (datos['microsegundos'] - base['microsegundos']) / base['microsegundos'] * 100
+        if perdida > umbral:
+            regresiones['arranque de ' + modulo] = perdida
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('modulos', nargs='*',
+                        help='cargas a ejecutar (todas por defecto): ' + ', '.join(sorted(_cargas)))
+    parser.add_argument('--salida', help='fichero JSON donde guardar los resultados')
+    parser.add_argument('--referencia', help='fichero JSON de una ejecución anterior')
+    parser.add_argument('--umbral', type=float, default=10.0,
+                        help='porcentaje de pérdida admitido respecto a la referencia')
+    parser.add_argument('--escala', type=float, default=1.0)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--arranque', action='store_true',
+                        help='medir también el tiempo de importación de cada módulo')
+    args = parser.parse_args(argv)
+    desconocidos = set(args.modulos) - set(_cargas)
+    if desconocidos:
+        parser.error('cargas desconocidas: ' + ', '.join(sorted(desconocidos)))
+
+    actual = ejecutar(args.modulos, args.escala, args.repeticiones)
+    if args.arranque:
+        actual['arranque'] = arranque(args.modulos, args.repeticiones)
+    texto = json.dumps(actual, indent=2, sort_keys=True)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+    if args.referencia:
+        with open(args.referencia) as f:
+            referencia = json.load(f)
+        regresiones = comparar(actual, referencia, args.umbral)
+        for modulo, perdida in sorted(regresiones.items()):
+            print('%s: %.1f%% más lento que la referencia' % (modulo, perdida), file=sys.stderr)
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
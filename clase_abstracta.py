@@ -138,8 +138,14 @@ Para utilizar esta clase, hay que instanciar el director, a continuación agrega
 y por último, ejecutar el método de creación/parametrización
 """
 
-director = Director()
-director.constructor = ConstructorPiramideVerde()
-director.configurarProducto()
 
-print(director.constructor.producto)
+def demo():
+    director = Director()
+    director.constructor = ConstructorPiramideVerde()
+    director.configurarProducto()
+
+    print(director.constructor.producto)
+
+
+if __name__ == '__main__':
+    demo()
@@ -54,55 +54,40 @@ class Composite(Componente):
         return '\n'.join(hojas)
 
 """
-He aquí la clase cliente, que utiliza nuestro patrón de diseño. Empezamos creando dos hojas:
+He aquí la clase cliente, que utiliza nuestro patrón de diseño (se ejecuta con python composite.py):
 """
 
-c1 = Hoja("H1")
-c2 = Hoja("H2")
 
-"""
-A continuación, un composite:
-"""
-c3 = Composite("C1")
-
-""""
-Al que es posible agregar hojas:
-"""
-c3.add(Hoja("H4"))
-c3.add(Hoja("H5"))
-c3.add(Hoja("H6"))
-
-"""
-También es posible crear un composite al que se agregan otros composites:
-"""
-
-c4 = Composite("C2")
-c41 = Composite("C3")
-
-"""
-Para ir más rápido, se agrega directamente los composites modificando el atributo que 
-los contiene:
-"""
-c41.contenido = [Hoja("H7"), Hoja("H8"), Hoja("H9")]
-c4.contenido = [Composite("C4"), c41, Hoja("HA")]
-
-"""
-Es posible, en cada etapa de la creación, verificar lo que responde el método de descripción. 
-También es posible agruparlo todo sobre la misma raíz:
-"""
-
-main = Composite('Test')
-main.contenido.extend([c1, c2, c3, c4])
-
-"""
-Se obtiene:
-"""
-print(main.verbose())
+def demo():
+    # Empezamos creando dos hojas:
+    c1 = Hoja("H1")
+    c2 = Hoja("H2")
 
+    # A continuación, un composite:
+    c3 = Composite("C1")
 
+    # Al que es posible agregar hojas:
+    c3.add(Hoja("H4"))
+    c3.add(Hoja("H5"))
+    c3.add(Hoja("H6"))
 
+    # También es posible crear un composite al que se agregan otros composites:
+    c4 = Composite("C2")
+    c41 = Composite("C3")
 
+    # Para ir más rápido, se agrega directamente los composites modificando el atributo que
+    # los contiene:
+    c41.contenido = [Hoja("H7"), Hoja("H8"), Hoja("H9")]
+    c4.contenido = [Composite("C4"), c41, Hoja("HA")]
 
+    # Es posible, en cada etapa de la creación, verificar lo que responde el método de descripción.
+    # También es posible agruparlo todo sobre la misma raíz:
+    main = Composite('Test')
+    main.contenido.extend([c1, c2, c3, c4])
 
+    # Se obtiene:
+    print(main.verbose())
 
 
+if __name__ == '__main__':
+    demo()
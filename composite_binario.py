@@ -0,0 +1,358 @@
+"""
+Guardar un árbol de composite.Composite con pickle significa serializar un grafo profundo de
+objetos Hoja/Composite: es lento, ocupa mucho y, con árboles muy profundos, pickle alcanza el
+límite de recursión.
+
+SOLUCIÓN: un formato binario compacto que aplana el árbol en tablas:
+- una tabla con el número de hijos de cada nodo, en preorden (el valor máximo del tipo marca
+  las hojas), con el tipo entero más estrecho que admite el mayor número de hijos;
+- el índice del nombre de cada nodo, con el ancho justo para el número de nombres distintos.
+  Si todos los nombres son distintos, el índice de cada nodo es su posición en el preorden y
+  la tabla no se guarda;
+- solo para los composites (en un árbol, muchos menos que las hojas), el tamaño de su
+  subárbol y cuántos composites contiene, con el ancho justo para el número de nodos;
+- un depósito de cadenas con los nombres distintos, codificados en UTF-8, y sus desplazamientos.
+
+Tanto la serialización como la deserialización recorren el árbol con una pila explícita, sin
+recursión, de modo que la profundidad no está limitada.
+
+Los tamaños de los subárboles permiten saltar de un hermano al siguiente sin recorrer sus
+descendientes. Gracias a ello, cargar(ruta, perezoso=True) proyecta el fichero con mmap y
+devuelve un CompositePerezoso, que solo crea los objetos de sus hijos la primera vez que se
+accede a su contenido. Un árbol enorme puede así recorrerse parcialmente sin cargarlo entero.
+
+Solo se conservan los tipos Hoja y Composite (una subclase se guarda como su clase base).
+"""
+
+import array
+import itertools
+import mmap
+import struct
+import sys
+
+from composite import Composite, Hoja
+
+_CABECERA = struct.Struct('<4sBBccQQQQ')
+_MAGICO = b'CMPB'
+_VERSION = 2
+_GRANDE = 1
+_ANCHO = 2
+_IDENTIDAD = 4
+HOJA = -1  # marca de las hojas al serializar; en el fichero es el máximo del tipo
+
+
+def _alinear(n):
+    return (n + 7) & ~7
+
+
+def _tipo(maximo):
+    """El typecode de array más estrecho que admite valores hasta maximo."""
+    for tipo in 'BHI':
+        if maximo < 1 << 8 * array.array(tipo).itemsize:
+            return tipo
+    return 'Q'
+
+
+def _maximo(tipo):
+    return (1 << 8 * array.array(tipo).itemsize) - 1
+
+
+def serializar(raiz):
+    hijos, indices = [], []
+    nombres = {}
+    anotar = nombres.setdefault
+
+    pila = [raiz]
+    while pila:
+        nodo = pila.pop()
+        indices.append(anotar(nodo.name, len(nombres)))
+        if not isinstance(nodo, Composite):
+            hijos.append(HOJA)
+            continue
+        contenido = nodo.contenido
+        hijos.append(len(contenido))
+        if all(type(hijo) is Hoja for hijo in contenido):
+            # caso frecuente: un composite cuyos hijos son todos hojas se vuelca de una vez
+            hijos.extend([HOJA] * len(contenido))
+            indices.extend([anotar(hijo.name, len(nombres)) for hijo in contenido])
+        else:
+            pila.extend(reversed(contenido))
+
+    # El tamaño de cada subárbol, y los composites que contiene, se calculan recorriendo el
+    # preorden al revés: los de los hijos de un composite son los últimos apilados
+    tamanos, compuestos, pila = [], [], []
+    for numero in reversed(hijos):
+        if numero == HOJA:
+            pila.append((1, 0))
+            continue
+        tamano = compuesto = 1
+        if numero:
+            for t, c in pila[-numero:]:
+                tamano += t
+                compuesto += c
+            del pila[-numero:]
+        pila.append((tamano, compuesto))
+        tamanos.append(tamano)
+        compuestos.append(compuesto)
+    tamanos.reverse()
+    compuestos.reverse()
+
+    tipo_hijos = _tipo(max(hijos) + 1)
+    hoja = _maximo(tipo_hijos)
+    tablas = [array.array(tipo_hijos, [hoja if numero == HOJA else numero for numero in hijos])]
+    opciones = _GRANDE if sys.byteorder == 'big' else 0
+    if len(nombres) == len(indices):
+        # nombres distintos: se anotan en preorden, de modo que el índice es la posición
+        opciones |= _IDENTIDAD
+    else:
+        tablas.append(array.array(_tipo(len(nombres)), indices))
+    tipo_tamanos = _tipo(len(hijos))
+    tablas += [array.array(tipo_tamanos, tamanos), array.array(tipo_tamanos, compuestos)]
+
+    # Los nombres van separados por '\0', para poder decodificarlos todos de una vez al cargar
+    codificados = [str(nombre).encode('utf-8') for nombre in nombres]
+    deposito = b'\0'.join(codificados)
+    if len(deposito) >= 1 << 32:
+        opciones |= _ANCHO
+    tablas.append(array.array('Q' if opciones & _ANCHO else 'I', itertools.accumulate(
+        (len(c) + 1 for c in codificados), initial=0)))
+    cabecera = _CABECERA.pack(_MAGICO, _VERSION, opciones, tipo_hijos.encode(),
+                              tipo_tamanos.encode(), len(hijos), len(compuestos),
+                              len(codificados), len(deposito))
+    partes = [cabecera]
+    for tabla in tablas:
+        datos = tabla.tobytes()
+        partes += [datos, bytes(_alinear(len(datos)) - len(datos))]
+    partes.append(deposito)
+    return b''.join(partes)
+
+
+class _Tablas:
+    """Vistas sobre las tablas de un árbol serializado (bytes, bytearray o mmap)."""
+
+    def __init__(self, datos, copiar):
+        (magico, version, opciones, tipo_hijos, tipo_tamanos, nodos, compuestos, nombres,
+         bytes_deposito) = _CABECERA.unpack_from(datos)
+        if magico != _MAGICO or version != _VERSION:
+            raise ValueError('no es un árbol serializado por composite_binario')
+        vista = memoryview(datos)
+        posicion = _CABECERA.size
+
+        def tabla(tipo, elementos):
+            nonlocal posicion
+            bytes_tabla = array.array(tipo).itemsize * elementos
+            resultado = vista[posicion:posicion + bytes_tabla].cast(tipo)
+            posicion += _alinear(bytes_tabla)
+            return resultado
+
+        tipo_hijos, tipo_tamanos = tipo_hijos.decode(), tipo_tamanos.decode()
+        self.hijos = tabla(tipo_hijos, nodos)
+        self.hoja = _maximo(tipo_hijos)
+        if opciones & _IDENTIDAD:
+            self.indices = range(nodos)
+        else:
+            self.indices = tabla(_tipo(nombres), nodos)
+        self.tamanos = tabla(tipo_tamanos, compuestos)
+        self.compuestos = tabla(tipo_tamanos, compuestos)
+        self.desplazamientos = tabla('Q' if opciones & _ANCHO else 'I', nombres + 1)
+        self.deposito = vista[posicion:posicion + bytes_deposito]
+        if bool(opciones & _GRANDE) != (sys.byteorder == 'big'):
+            if not copiar:
+                raise ValueError('orden de bytes distinto: no se puede cargar de forma perezosa')
+            self.hijos, self.tamanos, self.compuestos, self.desplazamientos = (
+                _invertir(tabla) for tabla in (self.hijos, self.tamanos, self.compuestos,
+                                               self.desplazamientos))
+            if not isinstance(self.indices, range):
+                self.indices = _invertir(self.indices)
+        self.nodos = nodos
+        self._nombres = {}
+
+    def nombre(self, i):
+        indice = self.indices[i]
+        nombre = self._nombres.get(indice)
+        if nombre is None:
+            nombre = self._nombres[indice] = str(
+                self.deposito[self.desplazamientos[indice]:self.desplazamientos[indice + 1] - 1],
+                'utf-8')
+        return nombre
+
+    def nombres(self):
+        nombres = str(self.deposito, 'utf-8').split('\0')
+        if len(nombres) == len(self.desplazamientos) - 1:
+            return nombres
+        # algún nombre contiene '\0': se recurre a los desplazamientos
+        d, deposito = self.desplazamientos, self.deposito
+        return [str(deposito[d[k]:d[k + 1] - 1], 'utf-8') for k in range(len(d) - 1)]
+
+    def nodo(self, i, compuesto=0):
+        """El nodo i; compuesto es su número de orden entre los composites, en preorden."""
+        if self.hijos[i] == self.hoja:
+            return _hoja(self.nombre(i))
+        return CompositePerezoso(self, i, compuesto)
+
+
+def _invertir(tabla):
+    copia = array.array(tabla.format, tabla)
+    copia.byteswap()
+    return copia
+
+
+def _hoja(nombre, crear=object.__new__):
+    hoja = crear(Hoja)
+    hoja.name = nombre
+    return hoja
+
+
+def deserializar(datos):
+    tablas = _Tablas(datos, copiar=True)
+    nombres = tablas.nombres()
+    hijos, indices, hoja = tablas.hijos, tablas.indices, tablas.hoja
+    crear = object.__new__
+    raiz = None
+    pila = []  # [contenido del composite abierto, hijos que le faltan]
+    i = 0
+    while i < tablas.nodos:
+        numero = hijos[i]
+        if numero == hoja:
+            nodo = _hoja(nombres[indices[i]])
+            i += 1
+        else:
+            nodo = crear(Composite)
+            nodo.name = nombres[indices[i]]
+            if numero and all(hijo == hoja for hijo in hijos[i + 1:i + 1 + numero]):
+                # todos sus hijos son hojas y ocupan las posiciones siguientes
+                nodo.contenido = [_hoja(nombres[k]) for k in indices[i + 1:i + 1 + numero]]
+                i += numero + 1
+                numero = 0
+            else:
+                nodo.contenido = []
+                i += 1
+        if pila:
+            abierto = pila[-1]
+            abierto[0].append(nodo)
+            abierto[1] -= 1
+            if not abierto[1]:
+                pila.pop()
+        else:
+            raiz = nodo
+        if numero != hoja and numero:
+            pila.append([nodo.contenido, numero])
+    return raiz
+
+
+class CompositePerezoso(Composite):
+    """Composite cuyos hijos se crean a partir de las tablas al acceder a contenido."""
+
+    def __init__(self, tablas, indice, compuesto):
+        self._tablas = tablas
+        self._indice = indice
+        self._compuesto = compuesto
+        self._contenido = None
+        self.name = tablas.nombre(indice)
+
+    @property
+    def contenido(self):
+        if self._contenido is None:
+            tablas = self._tablas
+            hijo, compuesto = self._indice + 1, self._compuesto + 1
+            contenido = []
+            for _ in range(tablas.hijos[self._indice]):
+                if tablas.hijos[hijo] == tablas.hoja:
+                    contenido.append(_hoja(tablas.nombre(hijo)))
+                    hijo += 1
+                else:
+                    contenido.append(CompositePerezoso(tablas, hijo, compuesto))
+                    hijo += tablas.tamanos[compuesto]
+                    compuesto += tablas.compuestos[compuesto]
+            self._contenido = contenido
+        return self._contenido
+
+    @contenido.setter
+    def contenido(self, contenido):
+        self._contenido = contenido
+
+    def __len__(self):
+        """Número de nodos del subárbol, sin cargarlo."""
+        return self._tablas.tamanos[self._compuesto]
+
+
+def guardar(raiz, ruta):
+    with open(ruta, 'wb') as f:
+        f.write(serializar(raiz))
+
+
+def cargar(ruta, perezoso=False):
+    with open(ruta, 'rb') as f:
+        if not perezoso:
+            return deserializar(f.read())
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return _Tablas(mapa, copiar=False).nodo(0)
+
+
+"""
+He aquí una comparación con pickle sobre un árbol completo de grado 10 (profundidad 6, es decir,
+1.111.111 nodos), y una cadena de 100.000 niveles que pickle no puede serializar:
+"""
+
+
+def arbol(grado, profundidad):
+    raiz = Composite('C')
+    pila = [(raiz, 0)]
+    while pila:
+        nodo, nivel = pila.pop()
+        if nivel + 1 == profundidad:
+            nodo.contenido = [Hoja('%s.%d' % (nodo.name, i)) for i in range(grado)]
+            continue
+        nodo.contenido = [Composite('%s.%d' % (nodo.name, i)) for i in range(grado)]
+        pila.extend((hijo, nivel + 1) for hijo in nodo.contenido)
+    return raiz
+
+
+def benchmark(grado=10, profundidad=6):
+    import gc
+    import os
+    import pickle
+    import tempfile
+    import time
+
+    resultados = {}
+    raiz = arbol(grado, profundidad)
+    gc.disable()
+    try:
+        for formato, volcar, leer in (('pickle', pickle.dumps, pickle.loads),
+                                      ('binario', serializar, deserializar)):
+            inicio = time.perf_counter()
+            datos = volcar(raiz)
+            intermedio = time.perf_counter()
+            leer(datos)
+            resultados[formato] = {'bytes': len(datos), 'serializar': intermedio - inicio,
+                                   'deserializar': time.perf_counter() - intermedio}
+
+        descriptor, ruta = tempfile.mkstemp(suffix='.cmpb')
+        os.close(descriptor)
+        try:
+            guardar(raiz, ruta)
+            inicio = time.perf_counter()
+            perezoso = cargar(ruta, perezoso=True)
+            perezoso.contenido[3].contenido[1].verbose()
+            resultados['perezoso'] = {'segundos': time.perf_counter() - inicio}
+        finally:
+            os.unlink(ruta)
+
+        cadena = hoja = Composite('0')
+        for i in range(1, 100_000):
+            hoja.contenido = [Composite(str(i))]
+            hoja = hoja.contenido[0]
+        try:
+            pickle.dumps(cadena)
+            resultados['cadena'] = {'pickle': 'ok'}
+        except RecursionError:
+            resultados['cadena'] = {'pickle': 'RecursionError'}
+        resultados['cadena']['binario'] = len(serializar(cadena))
+    finally:
+        gc.enable()
+    return resultados
+
+
+if __name__ == '__main__':
+    print(benchmark())
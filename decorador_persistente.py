@@ -0,0 +1,250 @@
+"""
+Los decoradores de decorador.py que guardan resultados en memoria los pierden cada vez que el
+proceso termina, de modo que un trabajo por lotes vuelve a calcular en cada ejecución los
+mismos resultados costosos.
+
+SOLUCIÓN: un decorador parametrizado, como Decorator(param), que guarda los resultados en un
+fichero SQLite local. La clave es un hash del código fuente de la función y de sus argumentos:
+si la función cambia, sus resultados antiguos dejan de usarse. Una segunda ejecución encuentra
+los resultados en el fichero y no vuelve a calcularlos.
+
+El tamaño total está acotado: al superar max_bytes se eliminan los resultados usados hace
+más tiempo (LRU). Varios procesos pueden usar el mismo fichero a la vez: SQLite en modo WAL
+permite lectores concurrentes con un escritor, las escrituras se serializan con BEGIN
+IMMEDIATE, y cada proceso (y cada hilo) abre su propia conexión, también después de un fork.
+
+Los resultados se recuperan con pickle.loads, de modo que el fichero debe ser de confianza:
+por defecto se guarda en un directorio de caché propio del usuario (~/.cache/tratamiento_datos,
+o $XDG_CACHE_HOME) con permisos 0700, y nunca en el directorio temporal compartido.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+
+_ESQUEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS resultados (
+    clave BLOB PRIMARY KEY, valor BLOB NOT NULL, tamano INTEGER NOT NULL, acceso REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS resultados_acceso ON resultados (acceso);
+CREATE TABLE IF NOT EXISTS total (bytes INTEGER NOT NULL);
+INSERT INTO total SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM total);
+CREATE TRIGGER IF NOT EXISTS total_insertar AFTER INSERT ON resultados
+    BEGIN UPDATE total SET bytes = bytes + NEW.tamano; END;
+CREATE TRIGGER IF NOT EXISTS total_borrar AFTER DELETE ON resultados
+    BEGIN UPDATE total SET bytes = bytes - OLD.tamano; END;
+COMMIT;
+"""
+
+
+class AlmacenSQLite:
+    """Almacén clave-valor en un fichero SQLite con tamaño acotado y desalojo LRU."""
+
+    def __init__(self, ruta, max_bytes=256 << 20, espera=30.0, resolucion=60.0):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.espera = espera
+        self.resolucion = resolucion
+        self._local = threading.local()
+
+    def _conexion(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # una conexión heredada de un fork no debe usarse en el hijo
+            conexion = sqlite3.connect(self.ruta, timeout=self.espera, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            conexion.executescript(_ESQUEMA)
+            local.conexion, local.pid = conexion, os.getpid()
+        return local.conexion
+
+    def leer(self, clave):
+        """Devuelve el valor guardado, o None, y marca la entrada como usada.
+
+        La marca de uso solo se actualiza si tiene más de resolucion segundos: así una lectura
+        repetida no toma el cerrojo de escritura de la base de datos en cada acierto.
+        """
+        conexion = self._conexion()
+        fila = conexion.execute('SELECT valor, acceso FROM resultados WHERE clave = ?',
+                                (clave,)).fetchone()
+        if fila is None:
+            return None
+        ahora = time.time()
+        if ahora - fila[1] > self.resolucion:
+            conexion.execute('UPDATE resultados SET acceso = ? WHERE clave = ?', (ahora, clave))
+        return fila[0]
+
+    def escribir(self, clave, valor):
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            conexion.execute('DELETE FROM resultados WHERE clave = ?', (clave,))
+            conexion.execute('INSERT INTO resultados VALUES (?, ?, ?, ?)',
+                             (clave, valor, len(valor), time.time()))
+            while conexion.execute('SELECT bytes FROM total').fetchone()[0] > self.max_bytes:
+                conexion.execute('DELETE FROM resultados WHERE clave IN '
+                                 '(SELECT clave FROM resultados ORDER BY acceso LIMIT 64)')
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            raise
+        conexion.execute('COMMIT')
+
+    def vaciar(self):
+        self._conexion().execute('DELETE FROM resultados')
+
+    def estadisticas(self):
+        conexion = self._conexion()
+        return {'entradas': conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()[0],
+                'bytes': conexion.execute('SELECT bytes FROM total').fetchone()[0]}
+
+
+"""
+La clave identifica la función por su código fuente (o, si no está disponible, por su
+bytecode y sus constantes) y los argumentos por su serialización con pickle. pickle recorre
+los conjuntos en el orden de sus hashes, que cambia de un proceso a otro (PYTHONHASHSEED), y
+los diccionarios en orden de inserción: antes de serializarlos, su contenido se ordena, de
+forma recursiva, para que argumentos iguales den siempre la misma clave.
+"""
+
+
+class _Conjunto(tuple):
+    """Forma canónica de un set o un frozenset: sus elementos, ordenados."""
+
+
+class _Diccionario(tuple):
+    """Forma canónica de un dict: sus pares (clave, valor), ordenados por clave."""
+
+
+def _ordenados(elementos):
+    # los elementos pueden no ser comparables entre sí: se ordenan por su serialización
+    return sorted(elementos, key=lambda elemento: pickle.dumps(elemento, 4))
+
+
+def _canonico(valor):
+    tipo = type(valor)
+    if tipo in (set, frozenset):
+        return _Conjunto((tipo.__name__, _ordenados(map(_canonico, valor))))
+    if tipo is dict:
+        return _Diccionario(_ordenados((_canonico(k), _canonico(v)) for k, v in valor.items()))
+    if tipo in (list, tuple):
+        return tipo(map(_canonico, valor))
+    return valor
+
+
+def _huellaFuncion(func):
+    try:
+        codigo = inspect.getsource(func).encode('utf-8')
+    except (OSError, TypeError):
+        code = getattr(func, '__code__', None)
+        if code is None:  # función de C: basta con su nombre y su módulo
+            codigo = repr(func).encode('utf-8')
+        else:
+            codigo = code.co_code + repr(code.co_consts).encode('utf-8')
+    nombre = '%s.%s' % (func.__module__, func.__qualname__)
+    return hashlib.sha256(nombre.encode('utf-8') + b'\0' + codigo).digest()
+
+
+def _clave(huella, args, kwargs):
+    argumentos = pickle.dumps(_canonico((args, sorted(kwargs.items()))), 4)
+    return hashlib.sha256(huella + argumentos).digest()
+
+
+def directorioCache():
+    """Directorio de caché privado del usuario: se crea con permisos 0700 y se comprueba que
+    nadie más pueda escribir en él."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    directorio = os.path.join(base, 'tratamiento_datos')
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    estado = os.stat(directorio)
+    if estado.st_uid != os.getuid() or estado.st_mode & 0o077:
+        raise PermissionError('%s debe pertenecer al usuario y tener permisos 0700' % directorio)
+    return directorio
+
+
+def Persistente(ruta=None, max_bytes=256 << 20):
+    almacen = AlmacenSQLite(ruta or os.path.join(directorioCache(), 'decorador_persistente.db'),
+                            max_bytes)
+
+    def Wrapper(func):
+        huella = _huellaFuncion(func)
+
+        @functools.wraps(func)
+        def Wrapped(*args, **kwargs):
+            clave = _clave(huella, args, kwargs)
+            guardado = almacen.leer(clave)
+            if guardado is not None:
+                Wrapped.aciertos += 1
+                return pickle.loads(guardado)
+            Wrapped.fallos += 1
+            resultado = func(*args, **kwargs)
+            almacen.escribir(clave, pickle.dumps(resultado, pickle.HIGHEST_PROTOCOL))
+            return resultado
+
+        Wrapped.almacen = almacen
+        Wrapped.aciertos = Wrapped.fallos = 0
+        return Wrapped
+
+    return Wrapper
+
+
+"""
+Para aplicarlo, basta con operar como con Decorator(20). En la medida, un primer proceso
+calcula el resultado y otro proceso distinto, como lo haría una nueva ejecución, lo lee del
+fichero:
+"""
+
+
+def fibonacciLento(n):
+    return n if n < 2 else fibonacciLento(n - 1) + fibonacciLento(n - 2)
+
+
+def _calcular(args):
+    ruta, n = args
+    funcion = Persistente(ruta)(fibonacciLento)
+    inicio = time.perf_counter()
+    funcion(n)
+    return time.perf_counter() - inicio, funcion.aciertos
+
+
+def _trabajar(args):
+    ruta, inicio = args
+    funcion = Persistente(ruta, max_bytes=1 << 15)(pow)
+    return [funcion(i, 2) for i in range(inicio, inicio + 2000)]
+
+
+def benchmark(ruta=None, procesos=4):
+    from concurrent.futures import ProcessPoolExecutor
+
+    resultados = {}
+    temporal = ruta is None
+    if temporal:
+        descriptor, ruta = tempfile.mkstemp(suffix='.db')
+        os.close(descriptor)
+    try:
+        for intento in ('frio', 'caliente'):
+            with ProcessPoolExecutor(1) as pool:
+                segundos, aciertos = pool.submit(_calcular, (ruta, 27)).result()
+            resultados[intento] = {'segundos': segundos, 'aciertos': aciertos}
+
+        # varios procesos escriben a la vez en el mismo fichero, con un tamaño máximo pequeño
+        with ProcessPoolExecutor(procesos) as pool:
+            listas = list(pool.map(_trabajar, [(ruta, 500 * i) for i in range(procesos)]))
+        assert all(lista == [i * i for i in range(500 * k, 500 * k + 2000)]
+                   for k, lista in enumerate(listas))
+        resultados['concurrente'] = AlmacenSQLite(ruta).estadisticas()
+    finally:
+        if temporal:
+            for sufijo in ('', '-wal', '-shm'):
+                if os.path.exists(ruta + sufijo):
+                    os.unlink(ruta + sufijo)
+    return resultados
+
+
+if __name__ == '__main__':
+    print(benchmark())
@@ -0,0 +1,201 @@
+"""
+Una función costosa en CPU no aprovecha más que un núcleo si se llama desde un único proceso.
+Enviar cada llamada a un ProcessPoolExecutor lo resuelve, pero cada envío cuesta un viaje de
+ida y vuelta entre procesos (serializar los argumentos, despertar al trabajador, serializar el
+resultado): con funciones cortas, ese coste se come la ganancia.
+
+SOLUCIÓN: un decorador parametrizado, siguiendo el patrón Decorator(param) de decorador.py,
+que hace que la función decorada se ejecute en un pool de procesos compartido. Cada llamada
+devuelve inmediatamente un Future. Las llamadas que llegan dentro de una ventana corta
+(latencia) se agrupan, hasta lote llamadas, en un único envío al pool, de modo que el coste
+del viaje se reparte entre todas ellas.
+
+    @EnPool(procesos=4, lote=64, latencia=0.002)
+    def costosa(x):
+        ...
+
+    futuros = [costosa(x) for x in datos]
+    resultados = [f.result() for f in futuros]
+
+Los procesos trabajadores no reciben la función (el nombre del módulo ya apunta a la versión
+decorada), sino su módulo y su nombre, y ejecutan la función original (__wrapped__).
+"""
+
+import functools
+import importlib
+import os
+import queue
+import threading
+import time
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def _pool(procesos):
+    with _lock:
+        pool = _pools.get(procesos)
+        if pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool = _pools[procesos] = ProcessPoolExecutor(procesos)
+        return pool
+
+
+def cerrarPools():
+    with _lock:
+        while _pools:
+            _pools.popitem()[1].shutdown()
+
+
+if hasattr(os, 'register_at_fork'):
+    # un hijo creado con fork no puede usar los pools (ni los hilos) del padre
+    os.register_at_fork(after_in_child=_pools.clear)
+
+"""
+En el trabajador, la función se resuelve una sola vez por proceso:
+"""
+
+_funciones = {}
+
+
+def _resolver(modulo, nombre):
+    funcion = _funciones.get((modulo, nombre))
+    if funcion is None:
+        funcion = importlib.import_module(modulo)
+        for parte in nombre.split('.'):
+            funcion = getattr(funcion, parte)
+        funcion = _funciones[(modulo, nombre)] = getattr(funcion, '__wrapped__', funcion)
+    return funcion
+
+
+def _ejecutarLote(modulo, nombre, llamadas):
+    funcion = _resolver(modulo, nombre)
+    resultados = []
+    for args, kwargs in llamadas:
+        try:
+            resultados.append((True, funcion(*args, **kwargs)))
+        except Exception as error:
+            resultados.append((False, error))
+    return resultados
+
+
+class _Agrupador:
+    """Reúne las llamadas de una función y las envía al pool por lotes desde un hilo."""
+
+    def __init__(self, modulo, nombre, procesos, lote, latencia):
+        self.modulo = modulo
+        self.nombre = nombre
+        self.procesos = procesos
+        self.lote = lote
+        self.latencia = latencia
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def enviar(self, futuro, args, kwargs):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._cola = queue.SimpleQueue()
+                    threading.Thread(target=self._agrupar, args=(self._cola,),
+                                     name='agrupador-' + self.nombre, daemon=True).start()
+                    self._pid = os.getpid()
+        self._cola.put((futuro, args, kwargs))
+
+    def _agrupar(self, cola):
+        while True:
+            pendientes = [cola.get()]
+            limite = time.monotonic() + self.latencia
+            while len(pendientes) < self.lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pendientes.append(cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._despachar(pendientes)
+
+    def _despachar(self, pendientes):
+        pendientes = [p for p in pendientes if p[0].set_running_or_notify_cancel()]
+        if not pendientes:
+            return
+        try:
+            envio = _pool(self.procesos).submit(_ejecutarLote, self.modulo, self.nombre,
+                                               [(args, kwargs) for _, args, kwargs in pendientes])
+        except Exception as error:
+            for futuro, _, _ in pendientes:
+                futuro.set_exception(error)
+            return
+
+        def repartir(envio):
+            try:
+                resultados = envio.result()
+            except BaseException as error:
+                for futuro, _, _ in pendientes:
+                    futuro.set_exception(error)
+                return
+            for (futuro, _, _), (correcto, valor) in zip(pendientes, resultados):
+                if correcto:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+
+        envio.add_done_callback(repartir)
+
+
+def EnPool(procesos=None, lote=64, latencia=0.002):
+    def Wrapper(func):
+        from concurrent.futures import Future
+
+        agrupador = _Agrupador(func.__module__, func.__qualname__, procesos or os.cpu_count(),
+                               lote, latencia)
+
+        @functools.wraps(func)
+        def Wrapped(*args, **kwargs):
+            futuro = Future()
+            agrupador.enviar(futuro, args, kwargs)
+            return futuro
+
+        Wrapped.agrupador = agrupador
+        return Wrapped
+
+    return Wrapper
+
+
+"""
+He aquí una medida del punto de cruce: para distintos costes por llamada, el tiempo de
+llamar n veces dentro del proceso frente al de hacerlo a través del pool.
+"""
+
+
+def trabajo(iteraciones):
+    total = 0
+    for i in range(iteraciones):
+        total += i * i % 7
+    return total
+
+
+def benchmark(n=2000, costes=(10, 100, 1000, 10_000, 100_000), procesos=None, lote=64):
+    enPool = EnPool(procesos, lote)(trabajo)
+    enPool(1).result()  # arranque de los trabajadores fuera de la medida
+    resultados = {}
+    for iteraciones in costes:
+        inicio = time.perf_counter()
+        esperado = [trabajo(iteraciones) for _ in range(n)]
+        local = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        futuros = [enPool(iteraciones) for _ in range(n)]
+        obtenido = [f.result() for f in futuros]
+        remoto = time.perf_counter() - inicio
+        assert obtenido == esperado
+        resultados[iteraciones] = {'proceso': local, 'pool': remoto, 'aceleracion': local / remoto}
+    cruce = [c for c, r in resultados.items() if r['aceleracion'] > 1]
+    return {'procesos': enPool.agrupador.procesos, 'resultados': resultados,
+            'cruce': cruce[0] if cruce else None}
+
+
+if __name__ == '__main__':
+    print(benchmark())
+    cerrarPools()
@@ -33,4 +33,119 @@ def fabrica(param):
         return B
 
 
-    
+"""
+Cuando se enrutan flujos muy grandes de enteros, decidir la clase elemento a elemento con un
+if tiene un coste apreciable. Una alternativa consiste en declarar las reglas (predicado -> clase)
+y compilarlas una única vez:
+- si las reglas solo dependen del resto de dividir por un módulo, se evalúan sobre cada resto
+  posible y se obtiene una tabla de búsqueda;
+- si NumPy está disponible, los predicados se aplican sobre el array completo como máscaras.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class FabricaCompilada:
+    """Elige una clase por parámetro a partir de reglas (predicado, clase), en orden.
+
+    Con un array de NumPy y sin módulo, cada predicado se llama una sola vez con el array
+    entero y debe devolver una máscara booleana de su misma forma (param % 2 == 0 sirve;
+    param in conjunto o un if sobre param, no). Si algún predicado no lo cumple, la fábrica
+    recurre a evaluar las reglas elemento a elemento, y lo recuerda para las siguientes
+    llamadas.
+    """
+
+    def __init__(self, reglas, defecto=None, modulo=None):
+        self.reglas = list(reglas)
+        self.defecto = defecto
+        self.modulo = modulo
+        self._tabla = None
+        self._vectorial = True
+        if modulo is not None:
+            self._tabla = [self._elegir(residuo) for residuo in range(modulo)]
+
+    def _elegir(self, param):
+        for predicado, clase in self.reglas:
+            if predicado(param):
+                return clase
+        return self.defecto
+
+    def __call__(self, param):
+        if self._tabla is not None:
+            return self._tabla[param % self.modulo]
+        return self._elegir(param)
+
+    def clases(self, params):
+        """Devuelve la lista de clases elegidas para cada parámetro, en una sola pasada."""
+        if numpy is not None and isinstance(params, numpy.ndarray):
+            clases = self._clasesNumpy(params)
+            if clases is not None:
+                return clases.tolist()
+            params = params.tolist()
+        if self._tabla is not None:
+            tabla, modulo = self._tabla, self.modulo
+            return [tabla[param % modulo] for param in params]
+        return list(map(self._elegir, params))
+
+    def _clasesNumpy(self, params):
+        if self._tabla is not None:
+            tabla = numpy.empty(self.modulo, dtype=object)
+            tabla[:] = self._tabla
+            return tabla[params % self.modulo]
+        if not self._vectorial:
+            return None
+        candidatas = numpy.empty(len(self.reglas) + 1, dtype=object)
+        candidatas[:] = [clase for _, clase in self.reglas] + [self.defecto]
+        indices = numpy.full(params.shape, len(self.reglas))
+        for i in range(len(self.reglas) - 1, -1, -1):
+            try:
+                mascara = self.reglas[i][0](params)
+            except (TypeError, ValueError):  # predicado que solo admite escalares
+                mascara = None
+            if (not isinstance(mascara, numpy.ndarray) or mascara.dtype != bool
+                    or mascara.shape != params.shape):
+                self._vectorial = False
+                return None
+            indices[mascara] = i
+        return candidatas[indices]
+
+    def agrupar(self, params):
+        """Agrupa los parámetros por la clase que les corresponde."""
+        grupos = {}
+        for clase, param in zip(self.clases(params), params):
+            grupos.setdefault(clase, []).append(param)
+        return grupos
+
+    def instanciar(self, params):
+        """Crea una instancia por parámetro, agrupadas por clase."""
+        return {clase: [clase() for _ in grupo] for clase, grupo in self.agrupar(params).items()}
+
+
+"""
+La fábrica anterior, expresada de manera declarativa:
+"""
+
+fabricaCompilada = FabricaCompilada([(lambda param: param % 2 == 0, A)], defecto=B, modulo=2)
+
+
+def benchmark(n=1_000_000):
+    import time
+
+    params = list(range(n))
+    inicio = time.perf_counter()
+    esperado = [fabrica(param) for param in params]
+    bucle = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtenido = fabricaCompilada.clases(params)
+    compilada = time.perf_counter() - inicio
+
+    assert esperado == obtenido
+    return {'n': n, 'bucle': bucle, 'compilada': compilada, 'aceleracion': bucle / compilada}
+
+
+if __name__ == '__main__':
+    print(benchmark())
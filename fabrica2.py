@@ -14,21 +14,44 @@ La inicialización de la clase está centrada en la clase madre, puesto que es c
 """
 
 import abc
+import io
 import os.path
 
+"""
+Los ficheros archivados llegan comprimidos (datos.csv.gz, notas.txt.bz2, tabla.pckl.xz).
+Para elegir el cargador no basta con la última extensión: si es la de un compresor, se
+descarta y se usa la anterior. El compresor se recuerda en el cargador, que descomprime al
+leer, por flujo y sin ficheros temporales. El módulo del compresor solo se importa al abrir
+un fichero comprimido.
+"""
+
+_COMPRESORES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+_BLOQUE = 1 << 20
+_COLA = 8
+
+
+def extensiones(filename):
+    """Devuelve (extensión, compresión), por ejemplo ('.csv', '.gz') para 'datos.csv.gz'."""
+    raiz, ext = os.path.splitext(filename)
+    if ext.lower() in _COMPRESORES:
+        return os.path.splitext(raiz)[-1], ext.lower()
+    return ext, None
+
 
 class Loader(metaclass=abc.ABCMeta):
-    def __new__(cls, filename):
-        ext = os.path.splitext(filename)[-1]
+    def __new__(cls, filename, fondo=False):
+        ext, compresion = extensiones(filename)
 
         for sub in cls.__subclasses__():
             if sub.isDesignedFor(ext):
+                # type.__call__ inicializa la instancia, ya que es de una subclase de cls
                 o = object.__new__(sub)
-                o.__init__(filename)
+                o.compresion = compresion
                 return o
 
-    def __init__(self, filename):
+    def __init__(self, filename, fondo=False):
         self.filename = filename
+        self.fondo = fondo
 
     @classmethod
     def isDesignedFor(cls, ext):
@@ -36,42 +59,116 @@ class Loader(metaclass=abc.ABCMeta):
             return True
         return False
 
+    def abrir(self, binario=False, newline=None):
+        """Abre el fichero para leer, descomprimiéndolo al vuelo si hace falta.
+
+        Con fondo=True, la descompresión se hace en un hilo aparte que entrega bloques al
+        lector a través de una cola acotada (zlib, bz2 y lzma liberan el GIL al descomprimir).
+        """
+        if self.compresion is None:
+            f = open(self.filename, 'rb', buffering=_BLOQUE)
+        else:
+            import importlib
+
+            f = importlib.import_module(_COMPRESORES[self.compresion]).open(self.filename, 'rb')
+            if self.fondo:
+                f = io.BufferedReader(_DescompresionEnFondo(f), _BLOQUE)
+        if binario:
+            return f
+        return io.TextIOWrapper(f, newline=newline)
+
     @abc.abstractmethod
     def load(self):
         return
 
 
+class _DescompresionEnFondo(io.RawIOBase):
+    """Flujo de lectura alimentado por un hilo que descomprime bloques del fichero origen."""
+
+    def __init__(self, origen):
+        import queue
+        import threading
+
+        self._origen = origen
+        self._cola = queue.Queue(_COLA)
+        self._parar = threading.Event()
+        self._resto = memoryview(b'')
+        self._fin = False
+        self._hilo = threading.Thread(target=self._producir, name='fabrica2-descompresion',
+                                      daemon=True)
+        self._hilo.start()
+
+    def _producir(self):
+        try:
+            with self._origen as f:
+                while not self._parar.is_set():
+                    bloque = f.read(_BLOQUE)
+                    self._cola.put(bloque)
+                    if not bloque:
+                        return
+        except BaseException as error:
+            self._cola.put(error)
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        if not self._resto:
+            if self._fin:
+                return 0
+            bloque = self._cola.get()
+            if isinstance(bloque, BaseException):
+                self._fin = True
+                raise bloque
+            if not bloque:
+                self._fin = True
+                return 0
+            self._resto = memoryview(bloque)
+        n = min(len(destino), len(self._resto))
+        destino[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            import queue
+
+            # Se vacía la cola hasta que el hilo termina, por si estaba bloqueado en put()
+            self._parar.set()
+            while self._hilo.is_alive():
+                try:
+                    self._cola.get_nowait()
+                except queue.Empty:
+                    self._hilo.join(0.01)
+        super().close()
+
+
 class TextLoader(Loader):
     extensions = ['.txt']
 
     def load(self):
         print('Archivo de Texto')
-
-
-#        with open(self.filename) as f:
-#           return f.readlines()
-
-import csv
+        with self.abrir() as f:
+            return f.readlines()
 
 
 class CSVLoader(Loader):
     extensions = ['.csv']
 
     def load(self):
-        print('Archivo CSV')
-
+        import csv
 
-#     with open(self.filename) as f:
-#          return csv.reader(f.read())
-
-import pickle
+        print('Archivo CSV')
+        with self.abrir(newline='') as f:
+            return list(csv.reader(f))
 
 
 class PickLoader(Loader):
     extensions = ['.pckl']
 
-    def load(self, filename):
-        print('Archivo Pickle')
+    def load(self):
+        import pickle
 
-#      with open(self.filename) as f:
-#            return pickle.load(f)
+        print('Archivo Pickle')
+        with self.abrir(binario=True) as f:
+            return pickle.load(f)
@@ -0,0 +1,76 @@
+"""
+Las fábricas de fabrica.py y fabrica2.py crean un objeto nuevo en cada llamada, aunque los
+parámetros sean idénticos. Cuando se vuelven a pedir constantemente los mismos pocos cientos
+de objetos (por ejemplo, Loader('x.csv')), resulta más eficaz internarlos: mientras un objeto
+siga vivo, pedirlo de nuevo con los mismos argumentos devuelve ese mismo objeto.
+
+SOLUCIÓN: envolver la fábrica con una caché de valores débiles indexada por los argumentos
+del constructor. La caché débil no impide que los objetos se liberen; para que los más
+usados no desaparezcan entre dos peticiones, se mantiene además una referencia fuerte a los
+maxsize últimos objetos entregados (LRU). Un cerrojo hace que dos hilos que piden el mismo
+objeto a la vez obtengan la misma instancia.
+"""
+
+import collections
+import threading
+import weakref
+
+import fabrica
+import fabrica2
+
+
+class FabricaInternada:
+    def __init__(self, constructor, maxsize=512):
+        self.constructor = constructor
+        self.maxsize = maxsize
+        self._vivos = weakref.WeakValueDictionary()
+        self._recientes = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __call__(self, *args, **kwargs):
+        clave = (args, frozenset(kwargs.items())) if kwargs else args
+        with self._lock:
+            objeto = self._vivos.get(clave)
+            if objeto is None:
+                self.fallos += 1
+                objeto = self.constructor(*args, **kwargs)
+                self._vivos[clave] = objeto
+            else:
+                self.aciertos += 1
+            self._recientes[clave] = objeto
+            self._recientes.move_to_end(clave)
+            if len(self._recientes) > self.maxsize:
+                self._recientes.popitem(last=False)
+        return objeto
+
+    def vaciar(self):
+        with self._lock:
+            self._recientes.clear()
+            self._vivos.clear()
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {'aciertos': self.aciertos, 'fallos': self.fallos,
+                'ratio': self.aciertos / total if total else 0.0, 'vivos': len(self._vivos)}
+
+
+"""
+fabrica.fabrica devuelve la clase, que ya es única; lo que se interna es la instancia creada
+a partir de ella. Para fabrica2, se interna directamente el cargador:
+"""
+
+
+def _instanciar(param):
+    return fabrica.fabrica(param)()
+
+
+fabricaInternada = FabricaInternada(_instanciar)
+LoaderInternado = FabricaInternada(fabrica2.Loader)
+
+
+if __name__ == '__main__':
+    print(LoaderInternado('x.csv') is LoaderInternado('x.csv'))
+    print(fabricaInternada(2) is fabricaInternada(2), fabricaInternada(2) is fabricaInternada(4))
+    print(LoaderInternado.estadisticas())
@@ -11,6 +11,12 @@ a una funcionalidad. Además, se complican un poco las cosas de cara a apreciar
 nuestra fachada:
 """
 
+import functools
+import io
+import itertools
+import sys
+import time
+
 
 class Word:
     def hello(self):
@@ -24,19 +30,19 @@ class Speaker:
     def __init__(self, name):
         self.name = name
 
-        @classmethod
-        def say(cls, what, to):
-            word = Word()
-            metodo = getattr(word, what)
-            if metodo is None:
-                return ' '
-            return ' '.join((metodo(), to))
+    @classmethod
+    def say(cls, what, to):
+        word = Word()
+        metodo = getattr(word, what, None)
+        if metodo is None:
+            return ' '
+        return ' '.join((metodo(), to))
 
-        def speak(self, what):
-            return Speaker.say(what, self.name)
+    def speak(self, what):
+        return Speaker.say(what, self.name)
 
-        def who(self):
-            return self.name
+    def who(self):
+        return self.name
 
 
 class Dialog:
@@ -55,6 +61,52 @@ class Dialog:
         return '\n'.join(['- %s' % s for s in sentences])
 
 
+"""
+Cuando se generan millones de diálogos a partir de plantillas, Dialog repite en cada llamada
+el mismo trabajo: crea los Speaker, un Word por frase, busca el método con getattr y formatea
+cada línea por separado. Sin embargo, los saludos y despedidas solo dependen de la pareja de
+interlocutores.
+
+Un diálogo compilado resuelve una única vez, por pareja, las frases de saludo y despedida,
+y se limita después a intercalar las frases propias del diálogo, escribiendo directamente
+en un buffer o flujo reutilizable:
+"""
+
+
+class DialogoCompilado:
+    __slots__ = ('cabecera', 'pie')
+
+    def __init__(self, speaker1, speaker2):
+        word = Word()
+        hola, adios = word.hello(), word.goodbye()
+        self.cabecera = '- %s %s\n- %s %s' % (hola, speaker1, hola, speaker2)
+        self.pie = '- %s %s\n- %s %s' % (adios, speaker1, adios, speaker2)
+
+    def escribir(self, sink, sentences=()):
+        """Escribe el diálogo en el sink, idéntico a Dialog(), sin salto de línea final."""
+        # como '- %s' en Dialog: las frases pueden ser de cualquier tipo, y un iterador vacío
+        # solo se sabe vacío después de recorrerlo
+        sentences = list(map(str, sentences))
+        sink.write(self.cabecera)
+        if sentences:
+            sink.write('\n- ')
+            sink.write('\n- '.join(sentences))
+        sink.write('\n')
+        sink.write(self.pie)
+
+    def __call__(self, sentences=()):
+        buffer = io.StringIO()
+        self.escribir(buffer, sentences)
+        return buffer.getvalue()
+
+
+@functools.lru_cache(maxsize=4096)
+def compilarDialogo(speaker1, speaker2):
+    """Devuelve el diálogo compilado de la pareja, reutilizándolo entre llamadas; solo se
+    conservan las parejas usadas más recientemente."""
+    return DialogoCompilado(speaker1, speaker2)
+
+
 """
 Se tienen, por tanto, tres clases y se pretende proveer una interfaz sencilla a un desarrollador que 
 utilizará nuestras clases, donde las dos funcionalidades esenciales son "hacer decir algo a alguien" 
@@ -67,34 +119,115 @@ He aquí una fachada apropiada:
 class Facade:
     @classmethod
     def say(cls, what, to):
-        print(Speaker.say(what, to))
+        cls.sayBatch([(what, to)], sys.stdout)
 
     def dialog(self, speaker1, speaker2, sentences):
-        dialog = Dialog(speaker1, speaker2)
-        dialog.sentences = sentences
-        print(dialog())
+        self.dialogBatch([(speaker1, speaker2, sentences)], sys.stdout)
+
+    """
+    Las versiones por lotes reciben un iterable de trabajos. Sin sink, devuelven un generador
+    de resultados; con sink, escriben cada resultado seguido de un salto de línea (como print)
+    acumulando la salida en un buffer. Con procesos, el trabajo se reparte en un pool.
+    """
+
+    @classmethod
+    def sayBatch(cls, jobs, sink=None, procesos=None, buffer=1 << 16):
+        return _ejecutarLote(_decir, jobs, sink, procesos, buffer)
+
+    def dialogBatch(self, jobs, sink=None, procesos=None, buffer=1 << 16):
+        return _ejecutarLote(_dialogar, jobs, sink, procesos, buffer)
+
+
+def _decir(job):
+    what, to = job
+    return Speaker.say(what, to)
+
+
+def _dialogar(job):
+    speaker1, speaker2, sentences = job
+    return compilarDialogo(speaker1, speaker2)(sentences)
+
+
+def _ejecutarLote(funcion, jobs, sink, procesos, buffer):
+    if procesos:
+        resultados = _enPool(funcion, jobs, procesos)
+    else:
+        resultados = map(funcion, jobs)
+    if sink is None:
+        return resultados
+    pendiente, tamano = [], 0
+    for resultado in resultados:
+        pendiente.append(resultado)
+        tamano += len(resultado) + 1
+        if tamano >= buffer:
+            pendiente.append('')
+            sink.write('\n'.join(pendiente))
+            pendiente, tamano = [], 0
+    if pendiente:
+        pendiente.append('')
+        sink.write('\n'.join(pendiente))
+
+
+def _enPool(funcion, jobs, procesos, chunksize=256):
+    from concurrent.futures import ProcessPoolExecutor
+
+    # map() del executor consume todo el iterable de golpe: se envía por tandas
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(procesos) as pool:
+        while True:
+            tanda = list(itertools.islice(jobs, chunksize * procesos * 4))
+            if not tanda:
+                return
+            yield from pool.map(funcion, tanda, chunksize=chunksize)
+
 
 """
 La fachada respeta las clases que utiliza, y proporciona dos métodos cuyas firmas son más 
 sencillas. El primero es una simple redirección hacia un método de otra clase, 
 el segundo realiza el trabajo suplementario para que el usuario no tenga que hacerlo. 
-
-He aquí cómo utilizar el primero:
 """
 
-Facade.say('hello', 'World')
-
-"""
-He aquí cómo utilizar el segundo:
-"""
 
-facade = Facade()
-facade.dialog('Plic', 'Ploc', ['Nice Factory', 'It works'])
+def demo():
+    # He aquí cómo utilizar el primero:
+    Facade.say('hello', 'World')
 
-"""
+    # He aquí cómo utilizar el segundo:
+    facade = Facade()
+    facade.dialog('Plic', 'Ploc', ['Nice Factory', 'It works'])
 
 
 """
+He aquí una comparación con el camino de Dialog():
+"""
 
 
+def benchmark(n=100_000):
+    parejas = [('Plic%d' % (i % 50), 'Ploc%d' % (i % 7)) for i in range(n)]
+    sentences = ['Nice Factory', 'It works']
 
+    inicio = time.perf_counter()
+    esperado = io.StringIO()
+    for speaker1, speaker2 in parejas:
+        dialog = Dialog(speaker1, speaker2)
+        dialog.sentences = sentences
+        esperado.write(dialog())
+        esperado.write('\n')
+    original = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    buffer = io.StringIO()
+    for speaker1, speaker2 in parejas:
+        compilarDialogo(speaker1, speaker2).escribir(buffer, sentences)
+        buffer.write('\n')
+    compilado = time.perf_counter() - inicio
+
+    assert esperado.getvalue() == buffer.getvalue()
+    return {'n': n, 'dialog': original, 'compilado': compilado,
+            'aceleracion': original / compilado}
+
+
+if __name__ == '__main__':
+    demo()
+    print(compilarDialogo('Plic', 'Ploc')(['Nice Factory', 'It works']))
+    print(benchmark())
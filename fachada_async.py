@@ -0,0 +1,144 @@
+"""
+La fachada también puede ofrecerse en versión asíncrona. Cuando los interlocutores proceden
+de fuentes lentas (un servicio remoto, una base de datos...), esperar a cada uno de forma
+síncrona bloquea el programa entero, mientras que con asyncio es posible mantener miles de
+diálogos en curso a la vez.
+
+SOLUCIÓN: una fachada cuyos métodos say y dialog son corrutinas. Los nombres de los
+interlocutores pueden ser cadenas o awaitables, que se resuelven antes de componer el
+diálogo. La composición en sí usa el diálogo compilado, que es rápido y no bloquea el bucle
+de eventos como lo haría Dialog con su trabajo por frase.
+
+Para los lotes, un semáforo limita el número de diálogos en curso y una cola acotada los
+separa del escritor: si el escritor no da abasto, la cola se llena, los diálogos esperan y
+el semáforo deja de admitir trabajos nuevos (contrapresión).
+"""
+
+import asyncio
+import inspect
+import time
+
+from fachada import Speaker, compilarDialogo
+
+
+async def _resolver(valor):
+    if inspect.isawaitable(valor):
+        return await valor
+    return valor
+
+
+class FacadeAsync:
+    def __init__(self, concurrencia=1000, cola=1024):
+        self.concurrencia = concurrencia
+        self.cola = cola
+
+    async def say(self, what, to):
+        return Speaker.say(what, await _resolver(to))
+
+    async def dialog(self, speaker1, speaker2, sentences):
+        speaker1, speaker2 = await asyncio.gather(_resolver(speaker1), _resolver(speaker2))
+        return compilarDialogo(speaker1, speaker2)(sentences)
+
+    async def dialogBatch(self, jobs, writer, encoding=None):
+        """Escribe en writer los diálogos de jobs, en orden de finalización.
+
+        writer ofrece write() y la corrutina drain(), como asyncio.StreamWriter; si
+        se indica encoding, se le envían bytes en lugar de texto.
+        """
+        cola = asyncio.Queue(self.cola)
+        semaforo = asyncio.Semaphore(self.concurrencia)
+        escritor = asyncio.ensure_future(self._escribir(cola, writer, encoding))
+        pendientes = set()
+        errores = []
+
+        async def ejecutar(job):
+            try:
+                await cola.put(await self.dialog(*job))
+            finally:
+                semaforo.release()
+
+        def terminada(tarea):
+            pendientes.discard(tarea)
+            if not tarea.cancelled() and tarea.exception() is not None:
+                errores.append(tarea.exception())
+
+        try:
+            for job in jobs:
+                await semaforo.acquire()
+                if errores or escritor.done():
+                    semaforo.release()
+                    break
+                tarea = asyncio.ensure_future(ejecutar(job))
+                pendientes.add(tarea)
+                tarea.add_done_callback(terminada)
+            while pendientes and not errores and not escritor.done():
+                await asyncio.wait(pendientes | {escritor}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for tarea in pendientes:
+                tarea.cancel()
+            if not escritor.done():
+                await cola.put(None)
+            await escritor
+        if errores:
+            raise errores[0]
+
+    @staticmethod
+    async def _escribir(cola, writer, encoding):
+        while True:
+            texto = await cola.get()
+            if texto is None:
+                return
+            texto += '\n'
+            writer.write(texto.encode(encoding) if encoding else texto)
+            if cola.empty():
+                await writer.drain()
+
+
+"""
+He aquí un servicio simulado que entrega nombres con cierta latencia, y un escritor en memoria
+con la misma interfaz que asyncio.StreamWriter:
+"""
+
+
+class ServicioNombresStub:
+    def __init__(self, latencia=0.01):
+        self.latencia = latencia
+
+    async def nombre(self, clave):
+        await asyncio.sleep(self.latencia)
+        return 'Speaker%s' % clave
+
+
+class EscritorMemoria:
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(datos)
+
+    async def drain(self):
+        await asyncio.sleep(0)
+
+    def getvalue(self):
+        return ''.join(self.partes)
+
+
+def benchmark(n=10_000, concurrencia=10_000, latencia=0.01):
+    servicio = ServicioNombresStub(latencia)
+    writer = EscritorMemoria()
+    fachada = FacadeAsync(concurrencia=concurrencia)
+
+    def jobs():
+        for i in range(n):
+            yield servicio.nombre(i % 100), servicio.nombre('B'), ['Nice Factory', 'It works']
+
+    inicio = time.perf_counter()
+    asyncio.run(fachada.dialogBatch(jobs(), writer))
+    segundos = time.perf_counter() - inicio
+    return {'n': n, 'concurrencia': concurrencia, 'segundos': segundos,
+            'secuencial_estimado': n * latencia, 'dialogos_por_segundo': n / segundos}
+
+
+if __name__ == '__main__':
+    print(asyncio.run(FacadeAsync().dialog(ServicioNombresStub().nombre(1), 'Ploc', ['Hola'])))
+    print(benchmark())
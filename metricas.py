@@ -0,0 +1,337 @@
+"""
+Para saber dónde se va el tiempo en los puntos calientes de los patrones (la carga y la
+transformación del puente, el despacho de fabrica2, la redirección del proxy, el clonado del
+prototipo), es útil contar operaciones y medir latencias. Pero esa instrumentación no debe
+costar nada cuando no se usa.
+
+SOLUCIÓN: la instrumentación es opcional y se aplica con decoradores. Mientras está
+desactivada, las clases son exactamente las originales; activar() reemplaza los métodos
+de los puntos calientes por versiones decoradas que actualizan un registro de contadores
+e histogramas, y desactivar() restaura los originales.
+
+Los bytes leídos son los que los loaders consumen realmente a través de su método abrir():
+tras una descompresión, los descomprimidos, y en una carga incremental, solo los nuevos. Los
+loaders que leen en otros procesos (CSVLoaderParalelo) no se cuentan. Las subclases de los
+loaders y transformadores del puente que se definen con la instrumentación ya activa también
+se instrumentan, mediante __init_subclass__.
+
+El registro se vuelca mediante un exportador intercambiable: un fichero JSON o un fichero
+en el formato de texto de Prometheus.
+
+    import metricas
+    metricas.activar()
+    ...
+    metricas.ExportadorPrometheus('metricas.prom').exportar(metricas.registro)
+"""
+
+import abc
+import bisect
+import functools
+import io
+import json
+import os
+import threading
+import time
+
+_LIMITES = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0)
+
+
+class Histograma:
+    def __init__(self, limites=_LIMITES):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+
+class Registro:
+    """Contadores e histogramas indexados por nombre y etiquetas."""
+
+    def __init__(self):
+        self.contadores = {}
+        self.histogramas = {}
+        self._lock = threading.Lock()
+
+    def contar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, segundos, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            histograma = self.histogramas.get(clave)
+            if histograma is None:
+                histograma = self.histogramas[clave] = Histograma()
+            histograma.observar(segundos)
+
+    def reiniciar(self):
+        with self._lock:
+            self.contadores.clear()
+            self.histogramas.clear()
+
+
+registro = Registro()
+
+"""
+He aquí los decoradores de cada punto caliente. Cada uno conserva la firma y los metadatos
+del método original gracias a functools.wraps.
+"""
+
+
+def _medirCarga(load):
+    @functools.wraps(load)
+    def medido(self, filename, *args, **kwargs):
+        inicio = time.perf_counter()
+        contenido = load(self, filename, *args, **kwargs)
+        clase = type(self).__name__
+        registro.observar('puente_carga_segundos', time.perf_counter() - inicio, loader=clase)
+        if isinstance(contenido, list):
+            registro.contar('puente_filas_total', len(contenido), loader=clase)
+        return contenido
+    return medido
+
+
+class _LecturaContada(io.RawIOBase):
+    """Flujo binario que cuenta en el registro los bytes que se leen a través de él."""
+
+    def __init__(self, f, nombre, loader):
+        self._f = f
+        self._nombre = nombre
+        self._loader = loader
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._f.readinto(b)
+        if n:
+            registro.contar(self._nombre, n, loader=self._loader)
+        return n
+
+    def seekable(self):
+        return self._f.seekable()
+
+    def seek(self, posicion, desde=io.SEEK_SET):
+        return self._f.seek(posicion, desde)
+
+    def tell(self):
+        return self._f.tell()
+
+    def fileno(self):
+        return self._f.fileno()
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+
+def _contarLectura(nombre):
+    def decorador(abrir):
+        @functools.wraps(abrir)
+        def medido(self, *args, binario=False, newline=None):
+            f = io.BufferedReader(_LecturaContada(abrir(self, *args, binario=True), nombre,
+                                                  type(self).__name__))
+            return f if binario else io.TextIOWrapper(f, newline=newline)
+        return medido
+    return decorador
+
+
+def _medirTransformacion(transformer):
+    @functools.wraps(transformer)
+    def medido(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = transformer(self, *args, **kwargs)
+        clase = type(self).__name__
+        registro.observar('puente_transformacion_segundos', time.perf_counter() - inicio,
+                          transformer=clase)
+        if self.content is not None:
+            registro.contar('puente_celdas_transformadas_total',
+                            sum(map(len, self.content)), transformer=clase)
+        return resultado
+    return medido
+
+
+def _medirDespacho(nuevo):
+    @functools.wraps(nuevo)
+    def medido(cls, filename, *args, **kwargs):
+        inicio = time.perf_counter()
+        loader = nuevo(cls, filename, *args, **kwargs)
+        registro.observar('fabrica2_despacho_segundos', time.perf_counter() - inicio)
+        registro.contar('fabrica2_despachos_total',
+                        loader=type(loader).__name__ if loader is not None else 'ninguno')
+        return loader
+    return medido
+
+
+def _contarRedireccion(getattr_):
+    @functools.wraps(getattr_)
+    def medido(self, name):
+        registro.contar('proxy_redirecciones_total', proxy=type(self).__name__)
+        return getattr_(self, name)
+    return medido
+
+
+def _medirClonado(nuevo):
+    @functools.wraps(nuevo)
+    def medido(cls, *args, **kwargs):
+        if cls._instance_reference is None:
+            return nuevo(cls, *args, **kwargs)
+        inicio = time.perf_counter()
+        clon = nuevo(cls, *args, **kwargs)
+        registro.observar('prototipo_clonado_segundos', time.perf_counter() - inicio)
+        registro.contar('prototipo_clonados_total', clase=cls.__name__)
+        return clon
+    return medido
+
+
+def _subclases(clase):
+    for sub in clase.__subclasses__():
+        yield sub
+        yield from _subclases(sub)
+
+
+def _jerarquias():
+    """Enumera (base, atributo, decorador): el atributo de cada subclase de base que lo define."""
+    import puente
+
+    yield puente.Loader, 'load', _medirCarga
+    yield puente.Transformer, 'transformer', _medirTransformacion
+
+
+def _puntos():
+    """Enumera (clase, atributo, decorador) de cada punto caliente instrumentable."""
+    import fabrica2
+    import prototipo
+    import proxy
+    import puente
+
+    for base, atributo, decorador in _jerarquias():
+        for clase in _subclases(base):
+            if atributo in vars(clase):
+                yield clase, atributo, decorador
+    yield puente.Loader, 'abrir', _contarLectura('puente_bytes_leidos_total')
+    yield fabrica2.Loader, 'abrir', _contarLectura('fabrica2_bytes_leidos_total')
+    yield fabrica2.Loader, '__new__', _medirDespacho
+    yield proxy.IdentityProxy, '__getattr__', _contarRedireccion
+    yield prototipo.Prototipo, '__new__', _medirClonado
+
+
+_originales = []
+_AUSENTE = object()
+
+
+def _instrumentar(clase, atributo, decorador):
+    original = vars(clase)[atributo]
+    funcion = original.__func__ if isinstance(original, staticmethod) else original
+    decorado = decorador(funcion)
+    setattr(clase, atributo, staticmethod(decorado) if atributo == '__new__' else decorado)
+    _originales.append((clase, atributo, original))
+
+
+def _vigilar(base, atributo, decorador):
+    """Instrumenta también las subclases de base que se definan mientras esté activo."""
+    def __init_subclass__(cls, **kwargs):
+        super(base, cls).__init_subclass__(**kwargs)
+        if atributo in vars(cls):
+            _instrumentar(cls, atributo, decorador)
+
+    _originales.append((base, '__init_subclass__', vars(base).get('__init_subclass__', _AUSENTE)))
+    base.__init_subclass__ = classmethod(__init_subclass__)
+
+
+def activar():
+    if _originales:
+        return
+    for clase, atributo, decorador in list(_puntos()):
+        _instrumentar(clase, atributo, decorador)
+    for base, atributo, decorador in _jerarquias():
+        _vigilar(base, atributo, decorador)
+
+
+def desactivar():
+    while _originales:
+        clase, atributo, original = _originales.pop()
+        if original is _AUSENTE:
+            delattr(clase, atributo)
+        else:
+            setattr(clase, atributo, original)
+
+
+def activas():
+    return bool(_originales)
+
+
+"""
+Exportadores: ambos reciben el registro y lo escriben de una vez en un fichero, reemplazando
+el anterior mediante un renombrado atómico para que un lector nunca vea un fichero a medias.
+"""
+
+
+class Exportador(metaclass=abc.ABCMeta):
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def exportar(self, registro):
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w') as f:
+            f.write(self.formatear(registro))
+        os.replace(temporal, self.ruta)
+
+    @abc.abstractmethod
+    def formatear(self, registro):
+        return
+
+
+class ExportadorJSON(Exportador):
+    def formatear(self, registro):
+        contadores = [{'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor}
+                      for (nombre, etiquetas), valor in sorted(registro.contadores.items())]
+        histogramas = [{'nombre': nombre, 'etiquetas': dict(etiquetas), 'limites': list(h.limites),
+                        'cubetas': h.cubetas, 'suma': h.suma, 'cuenta': h.cuenta}
+                       for (nombre, etiquetas), h in sorted(registro.histogramas.items())]
+        return json.dumps({'contadores': contadores, 'histogramas': histogramas}, indent=2)
+
+
+def _etiquetas(etiquetas, **extra):
+    pares = list(etiquetas) + list(extra.items())
+    if not pares:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                             for k, v in pares)
+
+
+class ExportadorPrometheus(Exportador):
+    def formatear(self, registro):
+        lineas, tipos = [], set()
+        for (nombre, etiquetas), valor in sorted(registro.contadores.items()):
+            if nombre not in tipos:
+                tipos.add(nombre)
+                lineas.append('# TYPE %s counter' % nombre)
+            lineas.append('%s%s %s' % (nombre, _etiquetas(etiquetas), valor))
+        for (nombre, etiquetas), h in sorted(registro.histogramas.items()):
+            if nombre not in tipos:
+                tipos.add(nombre)
+                lineas.append('# TYPE %s histogram' % nombre)
+            acumulado = 0
+            for limite, cuenta in zip(h.limites + ('+Inf',), h.cubetas):
+                acumulado += cuenta
+                lineas.append('%s_bucket%s %d' % (nombre, _etiquetas(etiquetas, le=limite), acumulado))
+            lineas.append('%s_sum%s %r' % (nombre, _etiquetas(etiquetas), h.suma))
+            lineas.append('%s_count%s %d' % (nombre, _etiquetas(etiquetas), h.cuenta))
+        return '\n'.join(lineas) + '\n'
+
+
+if __name__ == '__main__':
+    import proxy
+
+    activar()
+    proxy.formateador(proxy.Proyeccion(proxy.Punto(1, 2, 3)))
+    desactivar()
+    print(ExportadorPrometheus(os.devnull).formatear(registro))
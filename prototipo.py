@@ -28,30 +28,29 @@ class NoPrototipo:
 
     def __str__(self):
         return f'{self.a} {self.b} {self.c.a} {self.c.b.a}'
-    
-a = NoPrototipo()
 
-print(a)
 
 """
 He aquí como implementar el patrón de diseño por prototipo sobre este objeto.
 
 """
 
-from copy import deepcopy
 
 class Prototipo:
     _instance_reference = None
     
     def __new__(cls):
         if cls._instance_reference is not None:
+            from copy import deepcopy  # solo se necesita al clonar
+
             print('Clonando...')
             result = object.__new__(cls)
             result.__dict__ = deepcopy(cls._instance_reference.__dict__)
             return result
+        return object.__new__(cls)
     
     def __init__(self):
-        if self._instance_reference is None:
+        if type(self)._instance_reference is not None:  # clon: ya está inicializado
             return 
         self._instance_reference = None
         
@@ -66,6 +65,8 @@ class Prototipo:
         self.c.b = A()
         self.c.b.a = (1, 2, 3)
 
+        type(self)._instance_reference = self
+
     def __str__(self):
         return f'{self.a} {self.b} {self.c.a} {self.c.b.a}'
 
@@ -87,35 +88,30 @@ partir de la primera instancia.
     
 """
 
-b = Prototipo()
 
-print(b)
+def demo():
+    a = NoPrototipo()
+    print(a)
 
-"""
-La clase posee una referencia hacia esa instancia, aunque la propia instancia no hace referencia hacia ella.
+    b = Prototipo()
+    print(b)
 
-"""
-print(Prototipo.instance_reference)
+    # La clase posee una referencia hacia esa instancia, aunque la propia instancia no hace
+    # referencia hacia ella.
+    print(Prototipo._instance_reference is b, b.instance_reference)
 
-"""
-Se crea un segundo objeto, pero se clona a partir de la primera instancia.
+    # Se crea un segundo objeto, pero se clona a partir de la primera instancia.
+    c = Prototipo()
+    print(c)
 
-"""
-c = Prototipo()
-
-print(c)
 
 """
-Este se ha clonado, pasa por el método de inicialización, que se invoca automáticamente si el método
+El segundo objeto se ha clonado, pasa por el método de inicialización, que se invoca automáticamente si el método
 de construcción devuelve un objeto del tipo adecuado, aunque la primera línea de este método hace que salga 
 de él de forma inmediata. 
 
 """
 
 
-    
-            
-        
-    
-
-
+if __name__ == '__main__':
+    demo()
@@ -54,21 +54,6 @@ def formateador(punto):
     return '(%s)' % ', '.join((punto.x(), punto.y(), punto.z()))
 
 
-"""
-He aquí como construir nuestros puntos:
-"""
-
-punto = Punto(1, 2, 3)
-proyeccion = Proyeccion(punto)
-
-"""
-Y mostrarlos:
-"""
-
-print(formateador(punto))
-
-print(formateador(proyeccion))
-
 """
 Mas allá del contexto genérico, es posible crear un proxy a medida para presentar únicamente el método
 o los métodos que se quiere mostrar, omitiendo los demás. 
@@ -104,16 +89,6 @@ class ProxyDeA:
         return self.context.m3()
 
 
-"""
-He aquí las diferencias entre ambos:
-"""
-
-a1 = A()
-'m1' in dir(a1), 'm2' in dir(a1)
-
-a2 = ProxyDeA()
-'m1' in dir(a2), 'm2' in dir(a2)
-
 """
 He aquí una clase Proxy más genérica:
 """
@@ -127,15 +102,8 @@ class ProxySelectivo:
 
     def __getattr__(self, name):
         if name in self.redirected:
-            return setattr(self.context, name)
-
-"""
-Los métodos redirigidos no son visibles para dir, aunque están presentes:
-"""
+            return getattr(self.context, name)
 
-a3 = ProxySelectivo(A())
-'m1' in dir(a3), 'm2' in dir(a3)
-a3.m1, a3.m2
 
 """
 CONCLUSIONES: el Proxy es muy sencillo de implementar y permite simplificar la apariencia de un objeto. 
@@ -143,3 +111,27 @@ Por el contrario, es posible diseñar objetos muy complejos que permitan gestion
 y, a continuación, construir un proxy por cada caso de uso. 
 """
 
+
+def demo():
+    # He aquí como construir nuestros puntos:
+    punto = Punto(1, 2, 3)
+    proyeccion = Proyeccion(punto)
+
+    # Y mostrarlos:
+    print(formateador(punto))
+    print(formateador(proyeccion))
+
+    # He aquí las diferencias entre ambos proxies a medida:
+    a1 = A()
+    print('m1' in dir(a1), 'm2' in dir(a1))
+    a2 = ProxyDeA()
+    print('m1' in dir(a2), 'm2' in dir(a2))
+
+    # Los métodos redirigidos por ProxySelectivo no son visibles para dir, aunque están presentes:
+    a3 = ProxySelectivo(A())
+    print('m1' in dir(a3), 'm2' in dir(a3))
+    print(a3.m1, a3.m2)
+
+
+if __name__ == '__main__':
+    demo()
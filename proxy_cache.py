@@ -0,0 +1,142 @@
+"""
+Un proxy puede hacer algo más que redirigir: también puede recordar. Cuando el contexto es un
+objeto costoso (un cargador de ficheros, un servicio remoto...), las llamadas repetidas con los
+mismos argumentos pueden responderse desde el propio proxy sin llegar a tocar el contexto.
+
+SOLUCIÓN: extender el proxy identidad para que memorice el resultado de cada llamada a un
+método del contexto, usando como clave el nombre del método y sus argumentos. La memoria es
+limitada (se expulsa la entrada menos usada recientemente, LRU) y, opcionalmente, cada entrada
+caduca pasado un tiempo (TTL).
+
+Cuando se asigna un atributo a través del proxy hay dos políticas posibles:
+- escritura directa (write-through): el valor se escribe en el contexto de inmediato.
+- escritura diferida (write-back): el valor se guarda en el proxy y se escribe en el contexto
+  más tarde, al vaciar el proxy o antes de la siguiente llamada que tenga que llegar al contexto.
+
+En ambos casos, asignar un atributo invalida los resultados memorizados, puesto que pueden
+depender de él.
+"""
+
+import collections
+import functools
+import time
+
+from proxy import IdentityProxy
+
+ESCRITURA_DIRECTA = 'write-through'
+ESCRITURA_DIFERIDA = 'write-back'
+
+
+class ProxyCache(IdentityProxy):
+    _internos = frozenset(('context', '_politica', '_maxsize', '_ttl', '_cache',
+                           '_pendientes', 'aciertos', 'fallos'))
+
+    def __init__(self, context, maxsize=128, ttl=None, politica=ESCRITURA_DIRECTA):
+        if politica not in (ESCRITURA_DIRECTA, ESCRITURA_DIFERIDA):
+            raise ValueError('Política de escritura desconocida: %r' % politica)
+        IdentityProxy.__init__(self, context)
+        self._politica = politica
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._cache = collections.OrderedDict()
+        self._pendientes = {}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __getattr__(self, name):
+        if name in self._internos:
+            raise AttributeError(name)
+        if name in self._pendientes:
+            return self._pendientes[name]
+        atributo = getattr(self.context, name)
+        if not callable(atributo):
+            return atributo
+
+        @functools.wraps(atributo)
+        def memorizado(*args, **kwargs):
+            return self._llamar(name, args, kwargs)
+
+        return memorizado
+
+    def __setattr__(self, name, value):
+        if name in self._internos:
+            object.__setattr__(self, name, value)
+            return
+        self._cache.clear()
+        if self._politica == ESCRITURA_DIRECTA:
+            setattr(self.context, name, value)
+        else:
+            self._pendientes[name] = value
+
+    """
+    La búsqueda en la memoria: una entrada presente y no caducada es un acierto y se coloca al
+    final del orden LRU; en caso contrario se llama al contexto y se guarda el resultado.
+    """
+
+    def _llamar(self, name, args, kwargs):
+        clave = (name, args, tuple(sorted(kwargs.items()))) if kwargs else (name, args)
+        try:
+            entrada = self._cache.get(clave)
+        except TypeError:  # argumentos no hashables: no se puede memorizar
+            self.fallos += 1
+            return self._contexto(name)(*args, **kwargs)
+
+        if entrada is not None:
+            caducidad, resultado = entrada
+            if caducidad is None or caducidad > time.monotonic():
+                self.aciertos += 1
+                self._cache.move_to_end(clave)
+                return resultado
+            del self._cache[clave]
+
+        self.fallos += 1
+        resultado = self._contexto(name)(*args, **kwargs)
+        caducidad = None if self._ttl is None else time.monotonic() + self._ttl
+        self._cache[clave] = (caducidad, resultado)
+        if self._maxsize is not None and len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+        return resultado
+
+    def _contexto(self, name):
+        self.vaciar()
+        return getattr(self.context, name)
+
+    def vaciar(self):
+        """Escribe en el contexto los atributos pendientes (política write-back)."""
+        pendientes, self._pendientes = self._pendientes, {}
+        for name, value in pendientes.items():
+            setattr(self.context, name, value)
+
+    def invalidar(self):
+        self._cache.clear()
+
+    @property
+    def ratio(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def estadisticas(self):
+        return {'aciertos': self.aciertos, 'fallos': self.fallos,
+                'ratio': self.ratio, 'entradas': len(self._cache)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.vaciar()
+
+
+"""
+He aquí cómo usarlo delante de un punto: la segunda llamada a x() no llega al contexto.
+"""
+
+if __name__ == '__main__':
+    from proxy import Punto
+
+    punto = ProxyCache(Punto(1, 2, 3), maxsize=2)
+    punto.x(), punto.x(), punto.y(), punto.z()
+    print(punto.estadisticas())
+
+    with ProxyCache(Punto(1, 2, 3), politica=ESCRITURA_DIFERIDA) as diferido:
+        diferido._x = 10
+        print(diferido.context._x, diferido.x(), diferido.context._x)
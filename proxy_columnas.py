@@ -0,0 +1,263 @@
+"""
+La mayoría de los trabajos sobre un conjunto de datos por columnas usan unas pocas columnas
+(3 de 200, por ejemplo), pero cargar el fichero entero obliga a leer y a convertir todas.
+
+SOLUCIÓN: un proxy, basado en proxy.IdentityProxy, delante de un fichero columnar. Al crearlo
+solo se lee la cabecera, con el nombre, el tipo y la posición de cada columna. Una columna se
+lee la primera vez que se accede a ella (dataset.precio o dataset['precio']): el fichero se
+proyecta en memoria con mmap y la columna se entrega como un memoryview sobre sus bytes, sin
+copiarlos; el sistema solo lee del disco las páginas que se recorren. Las columnas que no se
+tocan no cuestan nada.
+
+Igual que ProxySelectivo.redirected, el parámetro redirected limita las columnas que el proxy
+deja ver: quien recibe el proxy solo puede acceder a las columnas permitidas.
+
+El formato del fichero es una cabecera JSON seguida de los datos de cada columna, alineados a
+8 bytes: los valores de un array (del módulo array) o, para las columnas de texto, una tabla
+de desplazamientos y las cadenas en UTF-8. Las columnas de texto tampoco se decodifican de
+golpe: cada cadena se decodifica al leerla.
+
+close(), o un bloque with, libera la proyección; a partir de entonces, las columnas entregadas
+dejan de poder usarse.
+"""
+
+import array
+import collections.abc
+import json
+import mmap
+import struct
+
+from proxy import IdentityProxy
+
+_MAGICO = b'COLS'
+_PREFIJO = struct.Struct('<4sQ')
+
+
+def _alinear(n):
+    return (n + 7) & ~7
+
+
+def escribirColumnar(ruta, columnas):
+    """Escribe un dict {nombre: array.array o lista de str} en formato columnar."""
+    bloques, cabecera, posicion = [], [], 0
+    for nombre, valores in columnas.items():
+        if isinstance(valores, array.array):
+            datos = [valores.tobytes()]
+            entrada = {'nombre': nombre, 'tipo': valores.typecode, 'filas': len(valores)}
+        else:
+            codificados = [str(valor).encode('utf-8') for valor in valores]
+            desplazamientos = array.array('Q', [0])
+            for codificado in codificados:
+                desplazamientos.append(desplazamientos[-1] + len(codificado))
+            datos = [desplazamientos.tobytes()] + codificados
+            entrada = {'nombre': nombre, 'tipo': 'str', 'filas': len(codificados)}
+        tamano = sum(map(len, datos))
+        entrada.update(inicio=posicion, bytes=tamano)
+        cabecera.append(entrada)
+        bloques.extend(datos)
+        bloques.append(bytes(_alinear(tamano) - tamano))
+        posicion += _alinear(tamano)
+
+    texto = json.dumps({'columnas': cabecera}).encode('utf-8')
+    texto += b' ' * (_alinear(len(texto) + _PREFIJO.size) - len(texto) - _PREFIJO.size)
+    with open(ruta, 'wb') as f:
+        f.write(_PREFIJO.pack(_MAGICO, len(texto)))
+        f.write(texto)
+        f.writelines(bloques)
+
+
+def guardarTabla(tabla, ruta):
+    """Escribe una puente_tipado.Tabla: sus arrays tal cual y el resto de columnas como texto."""
+    escribirColumnar(ruta, {nombre: columna.datos if isinstance(columna.datos, array.array)
+                            and columna.tipo != 'categoria' else list(columna)
+                            for nombre, columna in zip(tabla.nombres, tabla.columnas)})
+
+
+class ColumnaTexto(collections.abc.Sequence):
+    """Secuencia de solo lectura sobre los desplazamientos y las cadenas de una columna."""
+
+    def __init__(self, desplazamientos, texto):
+        self._desplazamientos = desplazamientos
+        self._texto = texto
+
+    def __len__(self):
+        return len(self._desplazamientos) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        i = range(len(self))[i]
+        return str(self._texto[self._desplazamientos[i]:self._desplazamientos[i + 1]], 'utf-8')
+
+    def release(self):
+        self._desplazamientos.release()
+        self._texto.release()
+
+
+class ArchivoColumnar:
+    """El sujeto real: lee la cabecera al crearse y cada columna solo cuando se pide."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            magico, longitud = _PREFIJO.unpack(f.read(_PREFIJO.size))
+            if magico != _MAGICO:
+                raise ValueError('%s no es un fichero columnar' % ruta)
+            cabecera = json.loads(f.read(longitud))
+        self._datos = _PREFIJO.size + longitud
+        self.esquema = {columna['nombre']: columna for columna in cabecera['columnas']}
+        self._mapa = None
+        self._vistas = []
+
+    @property
+    def nombres(self):
+        return list(self.esquema)
+
+    @property
+    def filas(self):
+        return max((c['filas'] for c in self.esquema.values()), default=0)
+
+    def columna(self, nombre):
+        entrada = self.esquema[nombre]
+        if self._mapa is None:
+            with open(self.ruta, 'rb') as f:
+                self._mapa = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        inicio = self._datos + entrada['inicio']
+        bloque = self._mapa[inicio:inicio + entrada['bytes']]
+        if entrada['tipo'] != 'str':
+            columna = bloque.cast(entrada['tipo'])
+        else:
+            filas = entrada['filas']
+            columna = ColumnaTexto(bloque[:8 * (filas + 1)].cast('Q'), bloque[8 * (filas + 1):])
+        self._vistas += [columna, bloque]
+        return columna
+
+    def close(self):
+        """Libera las columnas entregadas y la proyección del fichero."""
+        if self._mapa is None:
+            return
+        # el mmap no puede cerrarse mientras quede alguna vista sobre él
+        for vista in self._vistas:
+            vista.release()
+        self._vistas = []
+        vista, self._mapa = self._mapa, None
+        mapa = vista.obj
+        vista.release()
+        mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DatasetPerezoso(IdentityProxy):
+    redirected = None  # None: todas las columnas son visibles
+
+    def __init__(self, context, redirected=None):
+        if isinstance(context, str):
+            context = ArchivoColumnar(context)
+        IdentityProxy.__init__(self, context)
+        if redirected is not None:
+            desconocidas = set(redirected) - set(context.esquema)
+            if desconocidas:
+                raise KeyError('columnas desconocidas: %s' % ', '.join(sorted(desconocidas)))
+            self.redirected = list(redirected)
+        self._cargadas = {}
+
+    def __getattr__(self, name):
+        if name in ('context', '_cargadas'):
+            raise AttributeError(name)
+        if name in self.context.esquema:
+            try:
+                valor = self[name]
+            except KeyError:
+                raise AttributeError(name) from None
+            # las siguientes lecturas del atributo ya no pasan por __getattr__
+            self.__dict__[name] = valor
+            return valor
+        return getattr(self.context, name)
+
+    def __getitem__(self, nombre):
+        valor = self._cargadas.get(nombre)
+        if valor is None:
+            if self.redirected is not None and nombre not in self.redirected:
+                raise KeyError('columna no expuesta: %s' % nombre)
+            valor = self._cargadas[nombre] = self.context.columna(nombre)
+        return valor
+
+    def columna(self, nombre):
+        return self[nombre]
+
+    @property
+    def esquema(self):
+        return {nombre: self.context.esquema[nombre] for nombre in self.nombres}
+
+    @property
+    def nombres(self):
+        return list(self.redirected if self.redirected is not None else self.context.esquema)
+
+    @property
+    def filas(self):
+        # solo las columnas visibles: las ocultas no deben dejar ver ni su longitud
+        return max((entrada['filas'] for entrada in self.esquema.values()), default=0)
+
+    @property
+    def cargadas(self):
+        return list(self._cargadas)
+
+    def close(self):
+        for nombre in self._cargadas:
+            self.__dict__.pop(nombre, None)
+        self._cargadas.clear()
+        self.context.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+"""
+He aquí una medida con un fichero de 200 columnas, del que solo se usan 3:
+"""
+
+
+def benchmark(filas=50_000, columnas=200, usadas=3):
+    import os
+    import tempfile
+    import time
+
+    descriptor, ruta = tempfile.mkstemp(suffix='.cols')
+    os.close(descriptor)
+    try:
+        escribirColumnar(ruta, {'c%d' % i: array.array('d', range(i, i + filas))
+                                for i in range(columnas)})
+        elegidas = ['c%d' % (i * columnas // usadas) for i in range(usadas)]
+
+        inicio = time.perf_counter()
+        archivo = ArchivoColumnar(ruta)
+        todas = {}
+        with open(ruta, 'rb') as f:
+            for nombre, entrada in archivo.esquema.items():
+                f.seek(archivo._datos + entrada['inicio'])
+                todas[nombre] = array.array(entrada['tipo'], f.read(entrada['bytes']))
+        esperado = [sum(todas[nombre]) for nombre in elegidas]
+        completo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with DatasetPerezoso(ruta, redirected=elegidas) as dataset:
+            obtenido = [sum(dataset[nombre]) for nombre in elegidas]
+            perezoso = time.perf_counter() - inicio
+            cargadas = dataset.cargadas
+        assert obtenido == esperado
+        return {'bytes': os.path.getsize(ruta), 'completo': completo, 'perezoso': perezoso,
+                'cargadas': cargadas}
+    finally:
+        os.unlink(ruta)
+
+
+if __name__ == '__main__':
+    print(benchmark())
@@ -0,0 +1,206 @@
+"""
+Cuando se proyectan millones de puntos, crear un objeto Punto por cada uno de ellos
+y envolverlo en su propio proxy Proyeccion resulta muy costoso: cada coordenada
+se almacena como un objeto de Python y cada acceso pasa por __getattr__.
+
+SOLUCIÓN: almacenar todos los puntos en un único bloque contiguo de números en coma
+flotante (N filas por 3 columnas) y ofrecer la proyección como una vista sobre ese
+mismo bloque, sin copiar nada. La columna z de la proyección es una columna nula,
+que responde siempre 0 sin ocupar memoria.
+
+El formateo se realiza por bloques, tanto hacia un destino de texto como binario.
+"""
+
+import array
+import io
+import itertools
+import time
+
+from proxy import IdentityProxy
+
+
+class PuntoArray:
+    """Almacén de N puntos (x, y, z) en un array contiguo de dobles."""
+
+    __slots__ = ('_datos',)
+
+    def __init__(self, puntos=()):
+        self._datos = array.array('d')
+        for x, y, z in puntos:
+            self._datos.extend((x, y, z))
+
+    @classmethod
+    def deBuffer(cls, datos):
+        """Construye el almacén a partir de una secuencia plana x0, y0, z0, x1..."""
+        if len(datos) % 3:
+            raise ValueError('El buffer debe contener un múltiplo de 3 valores')
+        resultado = cls()
+        resultado._datos = array.array('d', datos)
+        return resultado
+
+    def __len__(self):
+        return len(self._datos) // 3
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return tuple(self._datos[3 * i:3 * i + 3])
+
+    def append(self, x, y, z):
+        """Añade un punto.
+
+        Un array no puede crecer mientras haya vistas (columna(), buffer()) vivas sobre él: en
+        ese caso se copia antes de añadir, y las vistas existentes siguen mostrando los puntos
+        anteriores.
+        """
+        try:
+            self._datos.extend((x, y, z))
+        except BufferError:
+            self._datos = array.array('d', self._datos)
+            self._datos.extend((x, y, z))
+
+    def columna(self, k):
+        """Vista (sin copia) de la columna k, con un paso de 3 elementos."""
+        return memoryview(self._datos)[k::3]
+
+    def x(self):
+        return self.columna(0)
+
+    def y(self):
+        return self.columna(1)
+
+    def z(self):
+        return self.columna(2)
+
+    def buffer(self):
+        return memoryview(self._datos)
+
+    """
+    El formato por bloques aplica una misma plantilla a un trozo entero del array,
+    de manera que el bucle de formateo se ejecuta en C y no en Python. %r da la misma
+    representación que str() sobre un float, que es lo que muestra proxy.formateador.
+    """
+
+    _plantilla = '(%r, %r, %r)\n'
+
+    def formatear(self, sink, bloque=4096):
+        """Escribe los puntos en texto, con el mismo aspecto que proxy.formateador aplicado a
+        puntos de coordenadas float."""
+        datos = self._datos
+        plantilla_bloque = self._plantilla * bloque
+        paso = 3 * bloque
+        total = len(datos)
+        for inicio in range(0, total - total % paso, paso):
+            sink.write(plantilla_bloque % tuple(datos[inicio:inicio + paso]))
+        resto = total % paso
+        if resto:
+            sink.write(self._plantilla * (resto // 3) % tuple(datos[total - resto:]))
+
+    def volcar(self, sink):
+        """Escribe los puntos en binario (dobles nativos, fila a fila)."""
+        sink.write(self.buffer())
+
+
+class ColumnaNula:
+    """Columna de longitud n que vale siempre 0, sin reservar memoria."""
+
+    __slots__ = ('_n',)
+
+    def __init__(self, n):
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ColumnaNula(len(range(*i.indices(self._n))))
+        if not -self._n <= i < self._n:
+            raise IndexError(i)
+        return 0.0
+
+    def __iter__(self):
+        return itertools.repeat(0.0, self._n)
+
+    def tolist(self):
+        return [0.0] * self._n
+
+
+"""
+He aquí la proyección vectorizada. Al igual que Proyeccion, hereda del proxy identidad,
+cuyo contexto es ahora el almacén completo y no un único punto:
+"""
+
+
+class ProyeccionArray(IdentityProxy):
+
+    # '%.0s' consume el valor de z sin mostrarlo, de modo que se imprime un 0 fijo
+    _plantilla = '(%r, %r, %.0s0)\n'
+
+    def __len__(self):
+        return len(self.context)
+
+    def __getitem__(self, i):
+        x, y, _ = self.context[i]
+        return x, y, 0.0
+
+    def z(self):
+        return ColumnaNula(len(self.context))
+
+    def formatear(self, sink, bloque=4096):
+        PuntoArray.formatear(self, sink, bloque)
+
+    @property
+    def _datos(self):
+        return self.context._datos
+
+    def volcar(self, sink, bloque=65536):
+        """Escribe los puntos proyectados en binario, anulando z en un buffer reutilizado."""
+        datos = self.context._datos
+        paso = 3 * bloque
+        ceros = array.array('d', bytes(8 * bloque))
+        for inicio in range(0, len(datos), paso):
+            trozo = datos[inicio:inicio + paso]
+            n = len(trozo) // 3
+            trozo[2::3] = ceros[:n]
+            sink.write(trozo)
+
+
+"""
+He aquí una comparación entre el camino objeto a objeto (Punto + Proyeccion + formateador)
+y el camino vectorizado:
+"""
+
+
+def benchmark(n=200_000):
+    from proxy import Punto, Proyeccion, formateador
+
+    puntos = [(i * 1234.5678901, i / 7, i + 0.1) for i in range(n)]
+
+    inicio = time.perf_counter()
+    sink = io.StringIO()
+    for p in puntos:
+        sink.write(formateador(Proyeccion(Punto(*p))))
+        sink.write('\n')
+    por_objeto = time.perf_counter() - inicio
+
+    almacen = PuntoArray(puntos)
+    inicio = time.perf_counter()
+    sink_vectorial = io.StringIO()
+    ProyeccionArray(almacen).formatear(sink_vectorial)
+    vectorial = time.perf_counter() - inicio
+
+    assert sink.getvalue() == sink_vectorial.getvalue()
+    return {'n': n, 'por_objeto': por_objeto, 'vectorial': vectorial,
+            'aceleracion': por_objeto / vectorial}
+
+
+if __name__ == '__main__':
+    almacen = PuntoArray([(123456.789, 0.1234567891, 1e6), (4.0, 5.5, 6.0)])
+    proyeccion = ProyeccionArray(almacen)
+    salida = io.StringIO()
+    proyeccion.formatear(salida)
+    print(salida.getvalue(), end='')
+    print(benchmark())
@@ -43,8 +43,15 @@ es relativo a la naturaleza de los datos que se han de cargar:
 """
 
 import abc
-import csv
-import pickle
+import itertools
+import os
+import stat
+import tempfile
+
+
+_BUFFER = 1 << 20
+_LOTE = 4096
+_COLA = 8
 
 
 class Loader(metaclass=abc.ABCMeta):
@@ -52,19 +59,162 @@ class Loader(metaclass=abc.ABCMeta):
     def load(self):
         return
 
+    def abrir(self, filename, binario=False, newline=None):
+        """Abre filename para leer. Los loaders leen siempre a través de este método, que
+        metricas.activar() instrumenta para contar los bytes leídos."""
+        if binario:
+            return open(filename, 'rb')
+        return open(filename, newline=newline)
+
+    def save(self, filename, filas, fondo=False):
+        """Escribe las filas en filename por lotes, con un búfer de escritura grande.
+
+        El fichero se escribe primero en un temporal único junto a filename, se lleva al disco
+        y se renombra al terminar, de modo que un lector nunca ve un fichero a medias, ni
+        siquiera tras una caída, y dos escrituras simultáneas no comparten el temporal. Con
+        fondo=True, la escritura se hace en un hilo aparte mientras el hilo actual sigue
+        produciendo filas.
+        """
+        if type(self).escribir is Loader.escribir:
+            raise TypeError('%s no sabe guardar ficheros' % type(self).__name__)
+        filas = iter(filas)
+        lotes = iter(lambda: list(itertools.islice(filas, _LOTE)), [])
+        directorio, nombre = os.path.split(filename)
+        descriptor, temporal = tempfile.mkstemp(prefix=nombre + '.', suffix='.tmp',
+                                                dir=directorio or os.curdir)
+        try:
+            with open(descriptor, 'wb', buffering=_BUFFER) as f:
+                if fondo:
+                    _escribirEnFondo(self.escribir, f, lotes)
+                else:
+                    self.escribir(f, lotes)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temporal, _permisos(filename))
+            os.replace(temporal, filename)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+    def escribir(self, f, lotes):
+        """Escribe los lotes de filas en el fichero binario f. Solo lo implementan los loaders
+        que saben guardar."""
+        raise TypeError('%s no sabe guardar ficheros' % type(self).__name__)
+
+
+def _permisos(filename):
+    """Los permisos del fichero que se reemplaza o, si no existe, los que le daría open()."""
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        mascara = os.umask(0o022)
+        os.umask(mascara)
+        return 0o666 & ~mascara
+
+
+def _escribirEnFondo(escribir, f, lotes):
+    """Entrega los lotes a un hilo escritor a través de una cola acotada."""
+    import queue
+    import threading
+
+    cola = queue.Queue(_COLA)
+    errores = []
+
+    def recibir():
+        while (lote := cola.get()) is not None:
+            yield lote
+
+    def trabajar():
+        try:
+            escribir(f, recibir())
+        except BaseException as error:
+            errores.append(error)
+            for _ in recibir():  # se vacía la cola para no bloquear al productor
+                pass
+
+    hilo = threading.Thread(target=trabajar, name='puente-escritor', daemon=True)
+    hilo.start()
+    try:
+        for lote in lotes:
+            if errores:
+                break
+            cola.put(lote)
+    finally:
+        cola.put(None)
+        hilo.join()
+    if errores:
+        raise errores[0]
+
+
+"""
+Los módulos csv y pickle solo se importan al cargar o guardar un fichero, de modo que importar
+el puente no tiene coste si no se utiliza ese formato.
+"""
+
 
 class CSVLoader(Loader):
     def load(self, filename):
         print('Archivo CSV')
-        with open(filename) as f:
-            return csv.reader(f.read())
+        return list(self.filas(filename))
+
+    def filas(self, filename):
+        """Genera las filas una a una, sin cargar el fichero entero en memoria."""
+        import csv
+
+        with self.abrir(filename, newline='') as f:
+            yield from csv.reader(f)
+
+    def escribir(self, f, lotes):
+        import csv
+        import io
+
+        texto = io.TextIOWrapper(f, newline='')
+        escritor = csv.writer(texto)
+        for lote in lotes:
+            escritor.writerows(lote)
+        texto.detach()
+
+
+"""
+save() escribe el pickle como una sucesión de registros, uno por lote de filas, para no tener
+que reunir todas las filas en memoria. load() y filas() leen tanto esos ficheros como los que
+contienen un único objeto.
+"""
+
+
+def _registrosPickle(f):
+    import pickle
+
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
 
 
 class PickleLoader(Loader):
     def load(self, filename):
         print('Archivo Pickle')
-        with open(filename) as f:
-            return pickle.load(f.read())
+        with self.abrir(filename, binario=True) as f:
+            registros = _registrosPickle(f)
+            # save() de un conjunto vacío no escribe ningún registro: se carga como lista vacía
+            contenido = next(registros, [])
+            for lote in registros:
+                contenido.extend(lote)
+            return contenido
+
+    def filas(self, filename):
+        with self.abrir(filename, binario=True) as f:
+            for lote in _registrosPickle(f):
+                yield from lote
+
+    def escribir(self, f, lotes):
+        import pickle
+
+        pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+        for lote in lotes:
+            pickler.dump(lote)
+            pickler.clear_memo()
 
 
 """
@@ -91,7 +241,7 @@ es decir, de las tres clases Loader; de ahí que sea de bajo nivel. El método d
 
 class UpperTransformer(Transformer):
     def transform(self):
-        pass
+        self.transformer()
 
     def __init__(self, filename, loader):
         self.content = None
@@ -107,16 +257,19 @@ class UpperTransformer(Transformer):
 
     def transformer(self):
         for i, l in enumerate(self.content):
-           for j, d in enumerate(l):
+            for j, d in enumerate(l):
                 self.content[i][j] = d.upper()
 
+    def saveDatos(self, filename, loader=None, fondo=False):
+        (loader or self.loader).save(filename, self.content, fondo)
+
 
-# type: ignore
 class LowerTransformer(Transformer):
     def transform(self):
-        pass
+        self.transformer()
 
     def __init__(self, filename, loader):
+        self.content = None
         self.filename = filename
         self.loader = loader
 
@@ -131,42 +284,55 @@ class LowerTransformer(Transformer):
     def transformer(self):
         for i, l in enumerate(self.content):
             for j, d in enumerate(l):
-                self.content[i][j] = d.lower
- # type: ignore
+                self.content[i][j] = d.lower()
+
+    def saveDatos(self, filename, loader=None, fondo=False):
+        (loader or self.loader).save(filename, self.content, fondo)
 
 
 """
-He aquí como utilizar este puente:
-"""
-test1 = UpperTransformer('datos.csv', loader=CSVLoader())
-# type: ignore
-"""
-El componente de implementación se pasa como parámetro. 
-Tan sólo queda usar los métodos. El de bajo nivel:
+He aquí como utilizar este puente (se ejecuta con python puente.py, que crea antes los ficheros
+de ejemplo datos.csv y test.pkl en un directorio temporal):
 """
 
-test1.loadDatos()
 
-"""
-Y el de alto nivel:
-"""
-test1.transform()
+def demo():
+    import os
+    import pickle
+    import tempfile
 
-"""
-También es posible ver a qué se parecen los datos así procesados:
-"""
-test1.content()
- # type: ignore
-"""
-He aquí el uso de los mismos componentes en otro contexto:
-"""
-test2 = LowerTransformer('test.pkl', loader=PickleLoader())
-test2.loadDatos()
+    with tempfile.TemporaryDirectory() as directorio:
+        datos_csv = os.path.join(directorio, 'datos.csv')
+        test_pkl = os.path.join(directorio, 'test.pkl')
+        with open(datos_csv, 'w') as f:
+            f.write('Chisme,algo\ncOsA,TRASTO\n')
+        with open(test_pkl, 'wb') as f:
+            pickle.dump([['Chisme', 'algo'], ['cOsA', 'TRASTO']], f)
+
+        test1 = UpperTransformer(datos_csv, loader=CSVLoader())
+
+        # El componente de implementación se pasa como parámetro.
+        # Tan sólo queda usar los métodos. El de bajo nivel:
+        test1.loadDatos()
+
+        # Y el de alto nivel:
+        test1.transform()
+
+        # También es posible ver a qué se parecen los datos así procesados:
+        print(test1.content)
+
+        # He aquí el uso de los mismos componentes en otro contexto:
+        test2 = LowerTransformer(test_pkl, loader=PickleLoader())
+        test2.loadDatos()
+        test2.transform()
+        print(test2.content)
+
+        # Y el camino inverso: guardar el resultado en cualquiera de los dos formatos.
+        test2.saveDatos(test_pkl)
+        test1.saveDatos(datos_csv, loader=PickleLoader(), fondo=True)
+        print(PickleLoader().load(datos_csv))
 
-test2.transform()
 
-test2.content()
- # type: ignore
 """
 Conclusiones:
 
@@ -183,3 +349,5 @@ ventajosas, aunque no son las preferentes.
 """
 
 
+if __name__ == '__main__':
+    demo()
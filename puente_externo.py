@@ -0,0 +1,224 @@
+"""
+Los transformadores del puente (UpperTransformer, LowerTransformer) modifican las celdas de
+self.content, que contiene el fichero entero en memoria. Para ordenar, eliminar duplicados o
+agrupar conjuntos de datos más grandes que la memoria disponible hace falta otro enfoque.
+
+SOLUCIÓN: dos nuevas etapas Transformer que trabajan por flujo y con un presupuesto de memoria:
+- OrdenacionExterna: ordena por tramos que caben en memoria, vuelca cada tramo ordenado a un
+  fichero temporal y mezcla todos los tramos con una mezcla de k vías (heapq.merge).
+  Opcionalmente, elimina las filas duplicadas durante la mezcla.
+- AgrupacionHash: agrupa en un diccionario en memoria; si se supera el presupuesto, reparte
+  los estados parciales y las filas restantes en particiones en disco según el hash de la
+  clave, y procesa cada partición por separado (recursivamente si sigue sin caber).
+
+Ambas leen las filas del loader con filas() cuando lo ofrece, o con load() en su defecto, y
+entregan el resultado como un generador con procesar(). transform() guarda ese generador en
+self.content, sin convertirlo en lista: el resultado tampoco tiene por qué caber en memoria,
+y se recorre una sola vez, por ejemplo al escribirlo con saveDatos().
+"""
+
+import heapq
+import itertools
+import operator
+import pickle
+import sys
+import tempfile
+
+from puente import Transformer
+
+_LOTE = 1024
+_VACIO = object()
+
+
+def _tamano(fila):
+    """Estimación de la memoria que ocupa una fila (lista de celdas)."""
+    return sys.getsizeof(fila) + sum(map(sys.getsizeof, fila))
+
+
+def _clave(columnas):
+    if callable(columnas):
+        return columnas
+    if isinstance(columnas, int):
+        return operator.itemgetter(columnas)
+    return lambda fila: tuple(fila[c] for c in columnas)
+
+
+def _filas(loader, filename):
+    if hasattr(loader, 'filas'):
+        return loader.filas(filename)
+    if hasattr(loader, 'lotes'):
+        return itertools.chain.from_iterable(loader.lotes(filename))
+    return iter(loader.load(filename) or ())
+
+
+def _volcar(elementos, directorio):
+    """Escribe los elementos por lotes en un fichero temporal y lo devuelve rebobinado."""
+    f = tempfile.TemporaryFile(dir=directorio)
+    for lote in iter(lambda: list(itertools.islice(elementos, _LOTE)), []):
+        pickle.dump(lote, f, pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+
+def _leer(f):
+    with f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+class _EtapaExterna(Transformer):
+    def __init__(self, filename, loader, columnas=0, memoria=64 << 20, directorio=None):
+        self.content = None
+        self.filename = filename
+        self.loader = loader
+        self.clave = _clave(columnas)
+        self.memoria = memoria
+        self.directorio = directorio
+
+    def loadDatos(self):
+        # Las etapas externas no cargan el fichero: lo recorren al transformar
+        pass
+
+    def transform(self):
+        self.content = self.procesar(_filas(self.loader, self.filename))
+
+    def saveDatos(self, filename, loader=None, fondo=False):
+        if self.content is None:
+            self.transform()
+        (loader or self.loader).save(filename, self.content, fondo)
+
+
+class OrdenacionExterna(_EtapaExterna):
+    """Ordena las filas por tramos en disco y los mezcla.
+
+    La mezcla abre como mucho mezcla_maxima ficheros a la vez: si hay más tramos, se mezclan
+    por grupos en varias pasadas, cada una de las cuales vuelca tramos más largos.
+    """
+
+    mezcla_maxima = 64
+
+    def __init__(self, filename, loader, columnas=0, memoria=64 << 20, directorio=None,
+                 unico=False, reverse=False):
+        _EtapaExterna.__init__(self, filename, loader, columnas, memoria, directorio)
+        self.unico = unico
+        self.reverse = reverse
+
+    def _orden(self):
+        # Para eliminar duplicados, las filas iguales deben quedar juntas: la fila completa
+        # desempata la clave, tanto al ordenar cada tramo como al mezclarlos
+        if not self.unico:
+            return self.clave
+        clave = self.clave
+        return lambda fila: (clave(fila), fila)
+
+    def procesar(self, filas):
+        orden = self._orden()
+        tramos, tramo, ocupado = [], [], 0
+        for fila in filas:
+            tramo.append(fila)
+            ocupado += _tamano(fila)
+            if ocupado > self.memoria:
+                tramo.sort(key=orden, reverse=self.reverse)
+                tramos.append(_volcar(iter(tramo), self.directorio))
+                tramo, ocupado = [], 0
+        tramo.sort(key=orden, reverse=self.reverse)
+
+        # Pasadas intermedias: se deja sitio para el tramo en memoria en la mezcla final
+        while len(tramos) >= self.mezcla_maxima:
+            tramos = [_volcar(heapq.merge(*map(_leer, tramos[i:i + self.mezcla_maxima]),
+                                          key=orden, reverse=self.reverse), self.directorio)
+                      for i in range(0, len(tramos), self.mezcla_maxima)]
+        mezcla = heapq.merge(*map(_leer, tramos), iter(tramo), key=orden, reverse=self.reverse)
+
+        if not self.unico:
+            yield from mezcla
+            return
+        anterior = object()
+        for fila in mezcla:
+            if fila != anterior:
+                yield fila
+                anterior = fila
+
+
+class AgrupacionHash(_EtapaExterna):
+    """Agrupa las filas por clave y acumula cada grupo con acumular(acumulado, fila).
+
+    inicial es una función sin argumentos que crea el acumulado vacío de cada grupo.
+    procesar() genera pares (clave, acumulado), sin un orden determinado.
+    """
+
+    particiones = 16
+    profundidad_maxima = 8
+
+    def __init__(self, filename, loader, columnas=0, memoria=64 << 20, directorio=None,
+                 inicial=int, acumular=lambda acumulado, fila: acumulado + 1):
+        _EtapaExterna.__init__(self, filename, loader, columnas, memoria, directorio)
+        self.inicial = inicial
+        self.acumular = acumular
+
+    def procesar(self, filas):
+        return self._agrupar((('fila', fila) for fila in filas), 0)
+
+    def _agrupar(self, elementos, profundidad):
+        grupos, ocupado = {}, 0
+        for tipo, dato in elementos:
+            if tipo == 'estado':
+                clave, acumulado = dato
+                ocupado += _tamano((clave, acumulado))
+            else:
+                clave = self.clave(dato)
+                acumulado = grupos.get(clave, _VACIO)
+                if acumulado is _VACIO:
+                    acumulado = self.inicial()
+                    ocupado += _tamano((clave, acumulado)) + 100
+                acumulado = self.acumular(acumulado, dato)
+            grupos[clave] = acumulado
+            if ocupado > self.memoria and profundidad < self.profundidad_maxima:
+                yield from self._particionar(grupos, elementos, profundidad)
+                return
+        yield from grupos.items()
+
+    def _particionar(self, grupos, elementos, profundidad):
+        ficheros = [tempfile.TemporaryFile(dir=self.directorio) for _ in range(self.particiones)]
+        lotes = [[] for _ in range(self.particiones)]
+
+        def repartir(clave, elemento):
+            i = hash((profundidad, clave)) % self.particiones
+            lotes[i].append(elemento)
+            if len(lotes[i]) >= _LOTE:
+                pickle.dump(lotes[i], ficheros[i], pickle.HIGHEST_PROTOCOL)
+                lotes[i] = []
+
+        for clave, acumulado in grupos.items():
+            repartir(clave, ('estado', (clave, acumulado)))
+        grupos.clear()
+        for tipo, dato in elementos:
+            repartir(dato[0] if tipo == 'estado' else self.clave(dato), (tipo, dato))
+        for f, lote in zip(ficheros, lotes):
+            if lote:
+                pickle.dump(lote, f, pickle.HIGHEST_PROTOCOL)
+            f.seek(0)
+        for f in ficheros:
+            yield from self._agrupar(_leer(f), profundidad + 1)
+
+
+if __name__ == '__main__':
+    import random
+
+    class LoaderAleatorio:
+        def filas(self, filename):
+            generador = random.Random(0)
+            for i in range(200_000):
+                yield ['clave%d' % generador.randrange(5000), str(i)]
+
+    ordenacion = OrdenacionExterna('aleatorio', LoaderAleatorio(), memoria=1 << 20)
+    ordenacion.transform()
+    print(list(itertools.islice(ordenacion.content, 3)))
+
+    agrupacion = AgrupacionHash('aleatorio', LoaderAleatorio(), memoria=1 << 18)
+    agrupacion.transform()
+    grupos = list(agrupacion.content)
+    print(len(grupos), sum(n for _, n in grupos))
@@ -0,0 +1,177 @@
+"""
+Cuando los ficheros de origen solo crecen (registros, exportaciones diarias...), volver a
+leerlos desde el principio en cada loadDatos() hace que el coste de cada recarga sea
+proporcional al tamaño total del fichero, y no a lo que se ha añadido desde la última vez.
+
+SOLUCIÓN: un loader incremental que guarda un punto de control (checkpoint) tras cada carga:
+la posición en bytes hasta la que se ha leído, el inodo del fichero y un hash de la última
+línea leída. La siguiente carga comprueba que el fichero sigue siendo el mismo y continúa
+desde esa posición, de modo que el transformador solo recibe las filas nuevas.
+
+Si el fichero ha sido truncado (es más corto que la posición guardada) o rotado (el inodo ha
+cambiado, o la última línea ya no coincide), se vuelve a leer entero y recargaCompleta lo
+indica, para que quien use el resultado descarte lo procesado anteriormente.
+
+Solo se consumen registros completos: si el final del fichero está a medio escribir, esa
+parte se deja para la siguiente carga. Un último registro sin salto de línea final se entrega,
+como haría CSVLoader, cuando el fichero no ha crecido desde la carga anterior (quien escribía
+ha terminado) o cuando se pide con finalizar=True; si después llega su salto de línea, se
+descarta en lugar de leerse como una fila vacía.
+"""
+
+import hashlib
+import json
+import os
+
+from puente import CSVLoader
+from puente_paralelo import comillaDialecto
+
+_BLOQUE = 1 << 24
+
+
+class Checkpoint:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.posicion = 0
+        self.inodo = None
+        self.ultima = None
+        self.longitud = 0
+        self.tamano = None  # tamaño del fichero al terminar la carga anterior
+        self.abierto = False  # el último registro entregado no tenía salto de línea
+
+    def cargar(self):
+        try:
+            with open(self.ruta) as f:
+                datos = json.load(f)
+        except FileNotFoundError:
+            return self
+        self.posicion = datos['posicion']
+        self.inodo = tuple(datos['inodo'])
+        self.ultima = datos['ultima']
+        self.longitud = datos['longitud']
+        self.tamano = datos.get('tamano')
+        self.abierto = datos.get('abierto', False)
+        return self
+
+    def guardar(self):
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w') as f:
+            json.dump({'posicion': self.posicion, 'inodo': self.inodo,
+                       'ultima': self.ultima, 'longitud': self.longitud,
+                       'tamano': self.tamano, 'abierto': self.abierto}, f)
+        os.replace(temporal, self.ruta)
+
+    def valido(self, f, estado):
+        """Indica si el fichero abierto es el mismo, y no truncado, que el del checkpoint."""
+        if self.inodo != (estado.st_dev, estado.st_ino) or estado.st_size < self.posicion:
+            return False
+        if self.longitud:
+            f.seek(self.posicion - self.longitud)
+            if _hash(f.read(self.longitud)) != self.ultima:
+                return False
+        return True
+
+
+def _hash(datos):
+    return hashlib.sha1(datos).hexdigest()
+
+
+def _corte(datos, comilla=b'"'):
+    """Posición tras el último salto de línea que no está dentro de un campo entre comillas.
+
+    Las comillas se cuentan una sola vez: se parte del total y, al retroceder de un salto de
+    línea al anterior, se restan las del tramo que queda detrás, sin volver a contar desde el
+    principio para cada candidato.
+    """
+    if comilla is None:  # dialecto sin comillas
+        return datos.rfind(b'\n') + 1
+    comillas = datos.count(comilla)
+    corte = len(datos)
+    while True:
+        salto = datos.rfind(b'\n', 0, corte)
+        if salto < 0:
+            return 0
+        comillas -= datos.count(comilla, salto + 1, corte)
+        if comillas % 2 == 0:
+            return salto + 1
+        corte = salto
+
+
+class CSVLoaderIncremental(CSVLoader):
+    def __init__(self, ruta_checkpoint=None, encoding='utf-8', dialecto='excel',
+                 finalizar=False):
+        self.ruta_checkpoint = ruta_checkpoint
+        self.encoding = encoding
+        self.dialecto = dialecto
+        self.finalizar = finalizar
+        self.recargaCompleta = False
+
+    def filas(self, filename):
+        """Genera las filas añadidas desde la última carga y actualiza el checkpoint al final."""
+        import csv
+        import io
+
+        comilla = comillaDialecto(self.dialecto, self.encoding)
+        checkpoint = Checkpoint(self.ruta_checkpoint or filename + '.checkpoint').cargar()
+        with self.abrir(filename, binario=True) as f:
+            estado = os.fstat(f.fileno())
+            self.recargaCompleta = not checkpoint.valido(f, estado)
+            if self.recargaCompleta:
+                checkpoint.posicion, checkpoint.longitud, checkpoint.ultima = 0, 0, None
+                checkpoint.tamano, checkpoint.abierto = None, False
+            checkpoint.inodo = (estado.st_dev, estado.st_ino)
+            f.seek(checkpoint.posicion)
+            # el último registro solo se entrega sin salto de línea si nadie sigue escribiendo
+            estable = self.finalizar or checkpoint.tamano == estado.st_size
+
+            pendiente = b''
+            while True:
+                bloque = f.read(_BLOQUE)
+                datos = pendiente + bloque
+                if checkpoint.abierto and datos:
+                    # el salto de línea que faltaba al registro ya entregado
+                    salto = 2 if datos.startswith(b'\r\n') else 1 if datos.startswith(b'\n') else 0
+                    datos = datos[salto:]
+                    checkpoint.posicion += salto
+                    checkpoint.abierto = False
+                corte = _corte(datos, comilla)
+                if not bloque and corte < len(datos) and estable:
+                    corte, checkpoint.abierto = len(datos), True
+                if corte:
+                    texto = datos[:corte].decode(self.encoding)
+                    yield from csv.reader(io.StringIO(texto, newline=''), self.dialecto)
+                    # datos empieza siempre en un límite de registro ya confirmado
+                    inicio = datos.rfind(b'\n', 0, corte - 1) + 1
+                    ultima = datos[inicio:corte]
+                    checkpoint.posicion += corte
+                    checkpoint.longitud, checkpoint.ultima = len(ultima), _hash(ultima)
+                pendiente = datos[corte:]
+                if not bloque:
+                    break
+        checkpoint.tamano = estado.st_size
+        checkpoint.guardar()
+
+    def load(self, filename):
+        print('Archivo CSV (incremental)')
+        return list(self.filas(filename))
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    from puente import UpperTransformer
+
+    with tempfile.TemporaryDirectory() as directorio:
+        datos = os.path.join(directorio, 'datos.csv')
+        with open(datos, 'w') as f:
+            f.write('Chisme,algo\n')
+        transformer = UpperTransformer(datos, loader=CSVLoaderIncremental())
+        transformer.loadDatos()
+        transformer.transform()
+        print(transformer.content)
+
+        with open(datos, 'a') as f:
+            f.write('cOsA,TRASTO\n"a medio')
+        transformer.loadDatos()
+        transformer.transform()
+        print(transformer.content, transformer.loader.recargaCompleta)
@@ -0,0 +1,160 @@
+"""
+El CSVLoader del puente lee y analiza el fichero entero en un único proceso. Con ficheros de
+varios gigabytes, el análisis del CSV se convierte en el cuello de botella, y solo aprovecha
+un núcleo.
+
+SOLUCIÓN: dividir el fichero en rangos de bytes y analizar cada rango en un proceso distinto.
+La dificultad está en que un rango no puede empezar en mitad de un registro, y que un salto de
+línea dentro de un campo entre comillas no marca el final de un registro. Para encontrar los
+límites se recorre el fichero contando comillas (una operación en C, muy rápida): un salto de
+línea precedido por un número par de comillas está fuera de cualquier campo y es, por tanto,
+un límite de registro válido.
+
+El loader es un Loader más del puente: load() devuelve todas las filas, mientras que lotes()
+entrega las filas de cada rango conforme se analizan, en orden o, si se pide, en el orden en
+que terminan los procesos.
+"""
+
+import mmap
+import os
+import time
+
+from puente import Loader
+
+_BLOQUE = 1 << 26
+
+
+def _contarComillas(mm, inicio, fin, comilla=b'"'):
+    if comilla is None:  # dialecto sin comillas: todo salto de línea es un límite
+        return 0
+    total = 0
+    for posicion in range(inicio, fin, _BLOQUE):
+        total += mm[posicion:min(fin, posicion + _BLOQUE)].count(comilla)
+    return total
+
+
+def comillaDialecto(dialecto, encoding='utf-8'):
+    """El carácter de comillas del dialecto de csv (nombre o clase), codificado, o None."""
+    import csv
+
+    if isinstance(dialecto, str):
+        dialecto = csv.get_dialect(dialecto)
+    comilla = getattr(dialecto, 'quotechar', '"')
+    return comilla.encode(encoding) if comilla else None
+
+
+def limitesRegistros(filename, partes, comilla=b'"'):
+    """Divide el fichero en como mucho partes rangos (inicio, fin) alineados a registros.
+
+    comilla es el carácter de comillas ya codificado (véase comillaDialecto), o None.
+    """
+    tamano = os.path.getsize(filename)
+    if tamano == 0:
+        return []
+    if partes <= 1:
+        return [(0, tamano)]
+    limites = [0]
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        comillas, posicion = 0, 0
+        for i in range(1, partes):
+            objetivo = max(tamano * i // partes, limites[-1])
+            comillas += _contarComillas(mm, posicion, objetivo, comilla)
+            posicion = objetivo
+            while True:
+                salto = mm.find(b'\n', posicion)
+                if salto == -1:
+                    break
+                comillas += _contarComillas(mm, posicion, salto, comilla)
+                posicion = salto + 1
+                if comillas % 2 == 0:
+                    break
+            if salto == -1 or posicion >= tamano:
+                break
+            if posicion > limites[-1]:
+                limites.append(posicion)
+    limites.append(tamano)
+    return list(zip(limites, limites[1:]))
+
+
+def _analizarRango(filename, inicio, fin, encoding, dialecto):
+    import csv
+    import io
+
+    with open(filename, 'rb') as f:
+        f.seek(inicio)
+        texto = f.read(fin - inicio).decode(encoding)
+    return list(csv.reader(io.StringIO(texto, newline=''), dialecto))
+
+
+class CSVLoaderParalelo(Loader):
+    def __init__(self, procesos=None, ordenado=True, rangos_por_proceso=4,
+                 encoding='utf-8', dialecto='excel'):
+        self.procesos = procesos or os.cpu_count()
+        self.ordenado = ordenado
+        self.rangos_por_proceso = rangos_por_proceso
+        self.encoding = encoding
+        self.dialecto = dialecto
+
+    def lotes(self, filename):
+        """Genera las filas de cada rango, un lote por rango."""
+        rangos = limitesRegistros(filename, self.procesos * self.rangos_por_proceso,
+                                  comillaDialecto(self.dialecto, self.encoding))
+        argumentos = [(filename, inicio, fin, self.encoding, self.dialecto) for inicio, fin in rangos]
+        if self.procesos == 1:
+            for args in argumentos:
+                yield _analizarRango(*args)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(self.procesos) as pool:
+            futuros = [pool.submit(_analizarRango, *args) for args in argumentos]
+            for futuro in (futuros if self.ordenado else as_completed(futuros)):
+                yield futuro.result()
+
+    def load(self, filename):
+        print('Archivo CSV (paralelo)')
+        filas = []
+        for lote in self.lotes(filename):
+            filas.extend(lote)
+        return filas
+
+
+"""
+He aquí una medida de escalado. Se genera un fichero con campos entre comillas que contienen
+saltos de línea y se analiza con distinto número de procesos:
+"""
+
+
+def generarCSV(filename, megas):
+    fila = '%d,"texto, con coma",' + '"línea 1\nlínea 2",' + 'x' * 40 + '\n'
+    objetivo, i = megas << 20, 0
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        while f.tell() < objetivo:
+            f.write(''.join(fila % (i + j) for j in range(10_000)))
+            i += 10_000
+
+
+def benchmark(filename=None, megas=256, trabajadores=(1, 2, 4, 8, 16)):
+    import tempfile
+
+    temporal = filename is None
+    if temporal:
+        descriptor, filename = tempfile.mkstemp(suffix='.csv')
+        os.close(descriptor)
+        generarCSV(filename, megas)
+    try:
+        resultados = {}
+        for procesos in trabajadores:
+            loader = CSVLoaderParalelo(procesos)
+            inicio = time.perf_counter()
+            filas = sum(len(lote) for lote in loader.lotes(filename))
+            resultados[procesos] = {'segundos': time.perf_counter() - inicio, 'filas': filas}
+        return resultados
+    finally:
+        if temporal:
+            os.unlink(filename)
+
+
+if __name__ == '__main__':
+    print(benchmark(megas=64, trabajadores=(1, 2, 4)))
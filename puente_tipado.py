@@ -0,0 +1,339 @@
+"""
+Todo lo que produce puente.CSVLoader son celdas str dentro de listas de listas. Cada cálculo
+numérico posterior vuelve a convertir esas cadenas, y cada celda cuesta un objeto str
+completo (más de 50 bytes), aunque contenga un solo dígito.
+
+SOLUCIÓN: inferir el tipo de cada columna a partir de una muestra de filas y analizar el
+fichero directamente en columnas tipadas:
+- int, float, bool y fecha se guardan en un array del módulo array (8, 8, 1 y 4 bytes por
+  valor; las fechas como ordinales de datetime.date).
+- Las columnas con pocos valores distintos se codifican como diccionario: un array de
+  códigos más la lista de categorías.
+- El resto quedan como listas de str.
+
+El análisis se hace por lotes de filas y columna a columna, con conversiones en bloque
+(array('q', map(int, columna))). Si un valor posterior a la muestra no encaja en el tipo
+inferido, la columna se amplía en lugar de fallar: int pasa a float si no se pierde precisión,
+y cualquier otro caso a str. Como el texto original no puede reconstruirse a partir de los
+valores convertidos ('007', 'yes', '1.50'...), las celdas ya analizadas de una columna que
+pasa a str se vuelven a leer del fichero al terminar. Igualmente, si una fila trae más
+celdas que la muestra, se añaden columnas str en lugar de descartarlas.
+
+Si NumPy está instalado, Columna.numpy() expone los datos sin copiarlos.
+"""
+
+import array
+import datetime
+import itertools
+import math
+import sys
+
+from puente import CSVLoader, Transformer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_LOTE = 8192
+_EXACTO = 1 << 53  # enteros representables sin pérdida en un float
+_VERDADEROS = frozenset(('true', 't', 'yes', 'si', 'sí'))
+_FALSOS = frozenset(('false', 'f', 'no'))
+
+
+def _bool(valor):
+    valor = valor.lower()
+    if valor in _VERDADEROS:
+        return 1
+    if valor in _FALSOS:
+        return 0
+    if not valor:
+        return -1
+    raise ValueError(valor)
+
+
+def _float(valor):
+    if not valor:
+        return math.nan
+    numero = float(valor)
+    if abs(numero) >= _EXACTO and not math.isinf(numero):
+        # un entero que un float no representa exactamente obliga a guardar la columna como str
+        try:
+            exacto = int(valor)
+        except ValueError:
+            return numero
+        if exacto != numero:
+            raise ValueError(valor)
+    return numero
+
+
+def _fecha(valor):
+    return datetime.date.fromisoformat(valor).toordinal() if valor else 0
+
+
+"""
+Cada tipo tiene el código del array en el que se guarda, la función que convierte una celda
+y la que recupera el valor de Python (los vacíos son NaN, -1 y el ordinal 0, que no
+corresponde a ninguna fecha).
+"""
+
+_TIPOS = {
+    'bool': ('b', _bool, lambda v: None if v < 0 else bool(v)),
+    'int': ('q', int, int),
+    'float': ('d', _float, float),
+    'fecha': ('i', _fecha, lambda v: datetime.date.fromordinal(v) if v else None),
+}
+_ORDEN = ('bool', 'int', 'float', 'fecha')
+
+
+def _tipoDe(valores, umbral_categorico):
+    if not any(valores):
+        # sin ningún valor en la muestra no hay nada de lo que deducir un tipo
+        return 'str'
+    for tipo in _ORDEN:
+        convertir = _TIPOS[tipo][1]
+        try:
+            # int no admite vacíos: una columna de enteros con huecos se guarda como float
+            for valor in valores:
+                convertir(valor)
+        except (ValueError, OverflowError):
+            continue
+        return tipo
+    if valores and len(set(valores)) <= umbral_categorico * len(valores):
+        return 'categoria'
+    return 'str'
+
+
+def inferirEsquema(filas, umbral_categorico=0.5):
+    """Devuelve el tipo de cada columna de una muestra de filas."""
+    columnas = list(itertools.zip_longest(*filas, fillvalue=''))
+    return [_tipoDe(columna, umbral_categorico) for columna in columnas]
+
+
+class Columna:
+    def __init__(self, tipo):
+        self.tipo = tipo
+        self.pendientes = 0
+        if tipo in _TIPOS:
+            self.datos = array.array(_TIPOS[tipo][0])
+        elif tipo == 'categoria':
+            self.datos = array.array('i')
+            self.categorias = []
+            self._codigos = {}
+        else:
+            self.datos = []
+
+    def __len__(self):
+        return len(self.datos)
+
+    def extender(self, valores):
+        if self.tipo == 'categoria':
+            codigos, categorias = self._codigos, self.categorias
+            for valor in dict.fromkeys(valores):
+                if valor not in codigos:
+                    codigos[valor] = len(categorias)
+                    categorias.append(valor)
+            self.datos.extend(map(codigos.__getitem__, valores))
+        elif self.tipo == 'str':
+            self.datos.extend(valores)
+        else:
+            try:
+                # se convierte el lote entero antes de añadirlo, para no dejarlo a medias
+                self.datos += array.array(self.datos.typecode, map(_TIPOS[self.tipo][1], valores))
+            except (ValueError, OverflowError):
+                self.ampliar()
+                self.extender(valores)
+
+    def ampliar(self):
+        """Pasa la columna a float (desde int, si todos sus valores caben sin pérdida) o a str.
+
+        Al pasar a str, las celdas ya analizadas quedan pendientes de releer con Tabla.releer(),
+        puesto que su texto original no se conserva.
+        """
+        if self.tipo == 'int' and all(-_EXACTO <= v <= _EXACTO for v in self.datos):
+            self.tipo, self.datos = 'float', array.array('d', self.datos)
+            return
+        self.tipo, self.pendientes = 'str', len(self.datos)
+        self.datos = [None] * len(self.datos)
+
+    def __getitem__(self, i):
+        if self.tipo == 'categoria':
+            return self.categorias[self.datos[i]]
+        if self.tipo == 'str':
+            return self.datos[i]
+        return _TIPOS[self.tipo][2](self.datos[i])
+
+    def __iter__(self):
+        if self.tipo == 'categoria':
+            return map(self.categorias.__getitem__, self.datos)
+        if self.tipo in ('str', 'int', 'float'):
+            return iter(self.datos)
+        return map(_TIPOS[self.tipo][2], self.datos)
+
+    def memoria(self):
+        if isinstance(self.datos, array.array):
+            total = self.datos.itemsize * len(self.datos)
+        else:
+            total = sum(map(sys.getsizeof, self.datos)) + 8 * len(self.datos)
+        if self.tipo == 'categoria':
+            total += sum(map(sys.getsizeof, self.categorias)) + 8 * len(self.categorias)
+        return total
+
+    def numpy(self):
+        """Vista NumPy de los datos (los códigos, en una columna categórica)."""
+        if numpy is None:
+            raise RuntimeError('NumPy no está instalado')
+        if isinstance(self.datos, array.array):
+            return numpy.frombuffer(self.datos, dtype=self.datos.typecode)
+        return numpy.array(self.datos, dtype=object)
+
+
+class Tabla:
+    def __init__(self, esquema, nombres=None):
+        self.columnas = [Columna(tipo) for tipo in esquema]
+        self.nombres = nombres or ['c%d' % i for i in range(len(esquema))]
+
+    @property
+    def esquema(self):
+        return [columna.tipo for columna in self.columnas]
+
+    def __len__(self):
+        return len(self.columnas[0]) if self.columnas else 0
+
+    def __getitem__(self, nombre):
+        return self.columnas[self.nombres.index(nombre) if isinstance(nombre, str) else nombre]
+
+    def agregar(self, filas):
+        ancho = max(map(len, filas), default=0)
+        if ancho > len(self.columnas):
+            # celdas más allá del esquema de la muestra: nuevas columnas de texto
+            for i in range(len(self.columnas), ancho):
+                columna = Columna('str')
+                columna.datos = [''] * len(self)
+                self.columnas.append(columna)
+                if len(self.nombres) <= i:
+                    self.nombres.append('c%d' % i)
+        ancho = len(self.columnas)
+        filas = [fila if len(fila) == ancho else fila + [''] * (ancho - len(fila))
+                 for fila in filas]
+        for columna, valores in zip(self.columnas, zip(*filas)):
+            columna.extender(valores)
+
+    def pendientes(self):
+        return [columna for columna in self.columnas if columna.pendientes]
+
+    def releer(self, filas):
+        """Rellena las celdas pendientes de las columnas ampliadas a str con el texto original.
+
+        filas debe generar de nuevo, desde el principio, las mismas filas entregadas a agregar().
+        """
+        pendientes = [(i, columna) for i, columna in enumerate(self.columnas) if columna.pendientes]
+        if not pendientes:
+            return
+        limite = max(columna.pendientes for _, columna in pendientes)
+        for n, fila in enumerate(itertools.islice(filas, limite)):
+            for i, columna in pendientes:
+                if n < columna.pendientes:
+                    columna.datos[n] = fila[i] if i < len(fila) else ''
+        for _, columna in pendientes:
+            columna.pendientes = 0
+
+    def filas(self):
+        """Genera las filas con valores de Python (int, float, bool, date o str)."""
+        return map(list, zip(*self.columnas))
+
+    def memoria(self):
+        return sum(columna.memoria() for columna in self.columnas)
+
+
+class CSVLoaderTipado(CSVLoader):
+    def __init__(self, muestra=1000, cabecera=False, umbral_categorico=0.5):
+        self.muestra = muestra
+        self.cabecera = cabecera
+        self.umbral_categorico = umbral_categorico
+
+    def load(self, filename):
+        print('Archivo CSV (tipado)')
+        filas = self.filas(filename)
+        nombres = list(next(filas, [])) if self.cabecera else None
+        muestra = list(itertools.islice(filas, self.muestra))
+        tabla = Tabla(inferirEsquema(muestra, self.umbral_categorico), nombres)
+        tabla.agregar(muestra)
+        for lote in iter(lambda: list(itertools.islice(filas, _LOTE)), []):
+            tabla.agregar(lote)
+        if tabla.pendientes():
+            filas = self.filas(filename)
+            if self.cabecera:
+                next(filas, None)
+            tabla.releer(filas)
+        return tabla
+
+
+"""
+Un transformador numérico: reescala cada columna int o float al intervalo [0, 1] trabajando
+directamente sobre los arrays, con NumPy si está disponible. El resto de columnas no cambian.
+"""
+
+
+class ReescaladoTransformer(Transformer):
+    def transform(self):
+        self.transformer()
+
+    def __init__(self, filename, loader):
+        self.content = None
+        self.filename = filename
+        self.loader = loader
+
+    def loadDatos(self):
+        self.content = self.loader.load(self.filename)
+
+    def transformer(self):
+        for columna in self.content.columnas:
+            if columna.tipo not in ('int', 'float') or not len(columna):
+                continue
+            if numpy is not None:
+                valores = columna.numpy().astype('d')
+                minimo, maximo = numpy.nanmin(valores), numpy.nanmax(valores)
+                valores -= minimo
+                if maximo > minimo:
+                    valores /= maximo - minimo
+                columna.tipo, columna.datos = 'float', array.array('d', valores.tobytes())
+                continue
+            presentes = [v for v in columna.datos if v == v]
+            minimo = min(presentes, default=0.0)
+            escala = (max(presentes, default=0.0) - minimo) or 1.0
+            columna.tipo = 'float'
+            columna.datos = array.array('d', [(v - minimo) / escala for v in columna.datos])
+
+
+def benchmark(filas=200_000):
+    import os
+    import tempfile
+    import time
+
+    from puente import CSVLoader
+
+    descriptor, filename = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(descriptor, 'w', newline='') as f:
+        for i in range(filas):
+            f.write('%d,%.3f,%s,2024-01-%02d,%s,texto libre %d\n'
+                    % (i, i * 0.5, 'true' if i % 3 else 'false', i % 28 + 1,
+                       ('norte', 'sur', 'este', 'oeste')[i % 4], i))
+    try:
+        inicio = time.perf_counter()
+        cadenas = CSVLoader().load(filename)
+        segundos_str = time.perf_counter() - inicio
+        memoria_str = sum(sys.getsizeof(fila) + sum(map(sys.getsizeof, fila)) for fila in cadenas)
+
+        inicio = time.perf_counter()
+        tabla = CSVLoaderTipado().load(filename)
+        segundos_tipado = time.perf_counter() - inicio
+        return {'esquema': tabla.esquema,
+                'segundos': {'str': segundos_str, 'tipado': segundos_tipado},
+                'bytes': {'str': memoria_str, 'tipado': tabla.memoria()}}
+    finally:
+        os.unlink(filename)
+
+
+if __name__ == '__main__':
+    print(benchmark())
@@ -4,18 +4,139 @@ En informática, se trata de una clase que posee una única instancia.
 
 """
 
+import os
+import threading
+import time
+import weakref
+
 
 class Singletown:
     instance = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls.instance is None:
-            cls.instance = object.__new__(cls)
-            return cls.instance
+            with cls._lock:
+                if cls.instance is None:
+                    cls.instance = object.__new__(cls)
+        return cls.instance
 
 
 # object() is object(), Singletown is Singletown()
 # (False, True)
 
+"""
+La comprobación se realiza dos veces (double-checked locking): la primera, sin cerrojo, es la
+que se ejecuta en casi todas las llamadas; la segunda, con el cerrojo, evita que dos hilos
+que llegan a la vez construyan cada uno su propia instancia.
+
+Para recursos costosos y compartidos (un pool de conexiones, una caché...) conviene además
+que la creación sea perezosa, mediante una fábrica que solo se llama la primera vez, y que
+cada proceso hijo creado con os.fork construya su propia instancia en lugar de heredar la del
+padre, cuyos sockets o hilos no son válidos en el hijo.
+"""
+
+
+class SingletownPerezoso:
+    def __init__(self, fabrica):
+        self._fabrica = fabrica
+        self._instancia = None
+        self._lock = threading.Lock()
+        _perezosos.add(self)
+
+    def get(self):
+        instancia = self._instancia
+        if instancia is None:
+            with self._lock:
+                instancia = self._instancia
+                if instancia is None:
+                    instancia = self._instancia = self._fabrica()
+        return instancia
+
+    __call__ = get
+
+    def reiniciar(self):
+        """Olvida la instancia; la siguiente llamada a get() la vuelve a construir."""
+        self._lock = threading.Lock()
+        self._instancia = None
+
+
+_perezosos = weakref.WeakSet()
+
+
+def _reiniciarTrasFork():
+    for singletown in list(_perezosos):
+        singletown.reiniciar()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciarTrasFork)
+
+"""
+Variante por hilo: cada hilo obtiene su propia instancia, construida también de manera
+perezosa, lo que evita compartir objetos que no son seguros entre hilos.
+"""
+
+
+class SingletownPorHilo:
+    def __init__(self, fabrica):
+        self._fabrica = fabrica
+        self._local = threading.local()
+        _perezosos.add(self)
+
+    def get(self):
+        try:
+            return self._local.instancia
+        except AttributeError:
+            instancia = self._local.instancia = self._fabrica()
+            return instancia
+
+    __call__ = get
+
+    def reiniciar(self):
+        self._local = threading.local()
+
+
+"""
+He aquí una medida de la contención: varios hilos piden la instancia a la vez, comparando
+con un singletown que toma el cerrojo en cada llamada.
+"""
+
+
+class _SingletownConCerrojo(SingletownPerezoso):
+    def get(self):
+        with self._lock:
+            if self._instancia is None:
+                self._instancia = self._fabrica()
+            return self._instancia
+
+
+def benchmark(hilos=8, llamadas=200_000):
+    resultados = {}
+    for nombre, clase in (('cerrojo', _SingletownConCerrojo), ('doble', SingletownPerezoso),
+                          ('por_hilo', SingletownPorHilo)):
+        singletown = clase(object)
+        barrera = threading.Barrier(hilos + 1)
+
+        def trabajo():
+            get = singletown.get
+            barrera.wait()
+            for _ in range(llamadas):
+                get()
+
+        trabajadores = [threading.Thread(target=trabajo) for _ in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        barrera.wait()
+        inicio = time.perf_counter()
+        for t in trabajadores:
+            t.join()
+        resultados[nombre] = hilos * llamadas / (time.perf_counter() - inicio)
+    return resultados
 
 
+if __name__ == '__main__':
+    print(Singletown() is Singletown())
+    pool = SingletownPerezoso(dict)
+    print(pool() is pool())
+    print(benchmark())
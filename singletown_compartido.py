@@ -0,0 +1,212 @@
+"""
+El singletown garantiza una única instancia por intérprete. Con multiprocessing, sin embargo,
+cada proceso trabajador es un intérprete distinto, y todos ellos acaban reconstruyendo (o
+recibiendo serializadas) las mismas tablas de solo lectura, que pueden ser muy grandes.
+
+SOLUCIÓN: construir el estado una única vez en el proceso padre y publicarlo en un bloque de
+memoria compartida: un fichero proyectado en memoria (mmap), en /dev/shm cuando el sistema lo
+ofrece. Los trabajadores no reciben los datos, sino solo el nombre del bloque, y se adjuntan
+a él: cada tabla es una memoryview sobre las mismas páginas físicas, sin copia alguna, de modo
+que la memoria apenas crece al añadir trabajadores.
+
+El estado es un diccionario de tablas planas (array.array o bytes). El bloque comienza con un
+índice en JSON que indica, para cada tabla, su tipo, su posición y su longitud.
+"""
+
+import array
+import atexit
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+_CABECERA = struct.Struct('<Q')
+_ALINEACION = 8
+
+
+def _serializar(tablas):
+    indice, posicion = {}, 0
+    for nombre, tabla in tablas.items():
+        tipo = tabla.typecode if isinstance(tabla, array.array) else 'B'
+        datos = memoryview(tabla).cast('B')
+        indice[nombre] = (tipo, posicion, datos.nbytes)
+        posicion += -(-datos.nbytes // _ALINEACION) * _ALINEACION
+    cabecera = json.dumps(indice).encode()
+    inicio = -(-(_CABECERA.size + len(cabecera)) // _ALINEACION) * _ALINEACION
+    return cabecera, inicio, inicio + posicion
+
+
+def _escribir(buffer, tablas, cabecera, inicio):
+    _CABECERA.pack_into(buffer, 0, len(cabecera))
+    buffer[_CABECERA.size:_CABECERA.size + len(cabecera)] = cabecera
+    for (tipo, posicion, longitud), tabla in zip(json.loads(cabecera).values(), tablas.values()):
+        buffer[inicio + posicion:inicio + posicion + longitud] = memoryview(tabla).cast('B')
+
+
+def _leer(buffer):
+    """Devuelve las tablas como memoryviews de solo lectura sobre el buffer."""
+    vista = memoryview(buffer).toreadonly()
+    longitud, = _CABECERA.unpack_from(vista, 0)
+    indice = json.loads(bytes(vista[_CABECERA.size:_CABECERA.size + longitud]))
+    inicio = -(-(_CABECERA.size + longitud) // _ALINEACION) * _ALINEACION
+    return {nombre: vista[inicio + posicion:inicio + posicion + tamano].cast(tipo)
+            for nombre, (tipo, posicion, tamano) in indice.items()}
+
+
+class SingletownCompartido:
+    """Tablas de solo lectura construidas una vez y compartidas entre procesos.
+
+    El bloque es un fichero proyectado con mmap, por defecto en /dev/shm (memoria, no
+    disco). Al serializarse con pickle solo viaja la ruta del bloque, y el trabajador
+    se adjunta a él la primera vez que llama a get(). Si el bloque no se ha publicado,
+    la primera llamada a get() en el proceso que tiene la fábrica lo publica.
+    """
+
+    def __init__(self, fabrica=None, ruta=None):
+        self._fabrica = fabrica
+        self.ruta = ruta
+        self._propietario = False
+
+    def publicar(self):
+        tablas = self._fabrica()
+        cabecera, inicio, total = _serializar(tablas)
+        descriptor, temporal = tempfile.mkstemp(prefix='singletown_', suffix='.bin',
+                                                dir=_directorio(self.ruta))
+        with open(descriptor, 'r+b') as f:
+            f.truncate(total)
+            with mmap.mmap(f.fileno(), total) as m:
+                _escribir(m, tablas, cabecera, inicio)
+        if self.ruta is None:
+            self.ruta = temporal
+        else:
+            os.replace(temporal, self.ruta)
+        self._propietario = True
+        _publicados[self.ruta] = os.getpid()
+        return self
+
+    def get(self):
+        try:
+            return _adjuntos[self.ruta][1]
+        except KeyError:
+            pass
+        if self.ruta is None:
+            # aún sin publicar: el proceso que tiene la fábrica publica en la primera llamada
+            if self._fabrica is None:
+                raise RuntimeError('SingletownCompartido sin publicar y sin fábrica')
+            self.publicar()
+        with open(self.ruta, 'rb') as f:
+            recurso = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _adjuntos[self.ruta] = (recurso, _leer(recurso))
+        return _adjuntos[self.ruta][1]
+
+    __call__ = get
+
+    def cerrar(self):
+        """Libera las vistas de este proceso; el propietario elimina además el bloque."""
+        _soltar(self.ruta)
+        if self._propietario:
+            _publicados.pop(self.ruta, None)
+            os.unlink(self.ruta)
+            self._propietario = False
+
+    def __reduce__(self):
+        # el trabajador solo recibe la ruta: el bloque tiene que existir antes de enviarla
+        if self.ruta is None:
+            if self._fabrica is None:
+                raise RuntimeError('SingletownCompartido sin publicar y sin fábrica')
+            self.publicar()
+        return SingletownCompartido, (None, self.ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def _directorio(ruta):
+    if ruta is not None:
+        return os.path.dirname(os.path.abspath(ruta))
+    return '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+_adjuntos = {}
+_publicados = {}
+
+
+def _soltar(ruta):
+    # Las vistas deben liberarse antes de cerrar el mmap, o este no se puede cerrar
+    recurso, tablas = _adjuntos.pop(ruta, (None, {}))
+    for vista in tablas.values():
+        vista.release()
+    if recurso is not None:
+        recurso.close()
+
+
+@atexit.register
+def _liberar():
+    for ruta in list(_adjuntos):
+        _soltar(ruta)
+    # Solo el proceso que publicó el bloque lo elimina, no sus hijos creados con fork
+    for ruta, pid in list(_publicados.items()):
+        if pid == os.getpid():
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                pass
+    _publicados.clear()
+
+
+"""
+He aquí una comparación entre adjuntarse al bloque y recibir las tablas serializadas, tal como
+ocurriría al pasarlas a cada trabajador de un pool. Además del tiempo, cada trabajador informa
+de su memoria residente (RSS) mientras tiene las tablas en uso; las páginas del bloque que no
+se recorren no llegan a formar parte de ella:
+"""
+
+
+def _memoriaResidente(_=None):
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:  # sin /proc: el máximo alcanzado, que getrusage da en KiB en Linux
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _sumarCompartido(singletown):
+    return sum(singletown.get()['valores'][:1000]), _memoriaResidente()
+
+
+def _sumarCopiado(tablas):
+    return sum(tablas['valores'][:1000]), _memoriaResidente()
+
+
+def benchmark(elementos=10_000_000, trabajadores=4, tareas=16):
+    import multiprocessing
+    import time
+
+    def fabrica():
+        return {'valores': array.array('d', range(elementos))}
+
+    resultados = {}
+    contexto = multiprocessing.get_context('spawn')
+    with SingletownCompartido(fabrica) as compartido:
+        for modo, funcion, argumento in (('copiado', _sumarCopiado, fabrica()),
+                                         ('compartido', _sumarCompartido, compartido)):
+            # un pool por modo, para que la memoria de uno no se sume a la del otro
+            with contexto.Pool(trabajadores) as pool:
+                base = max(pool.map(_memoriaResidente, [None] * trabajadores, chunksize=1))
+                inicio = time.perf_counter()
+                respuestas = pool.map(funcion, [argumento] * tareas)
+                segundos = time.perf_counter() - inicio
+            resultados[modo] = {'segundos': segundos,
+                                'rss_trabajador': max(rss for _, rss in respuestas),
+                                'rss_arranque': base}
+    return resultados
+
+
+if __name__ == '__main__':
+    print(benchmark())
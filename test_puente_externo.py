@@ -0,0 +1,67 @@
+import random
+import tracemalloc
+import unittest
+
+from puente_externo import OrdenacionExterna, _tamano
+
+
+class LoaderAleatorio:
+    def __init__(self, filas, distintos):
+        self.n = filas
+        self.distintos = distintos
+
+    def filas(self, filename):
+        generador = random.Random(0)
+        for _ in range(self.n):
+            valor = generador.randrange(self.distintos)
+            yield ['clave%d' % (valor % 3), str(valor)]
+
+
+class TestOrdenacionExterna(unittest.TestCase):
+    def ordenar(self, memoria, **opciones):
+        ordenacion = OrdenacionExterna('aleatorio', LoaderAleatorio(20_000, 9), memoria=memoria,
+                                       **opciones)
+        ordenacion.transform()
+        return list(ordenacion.content)
+
+    def test_unico_con_volcado_a_disco(self):
+        esperado = sorted(set(map(tuple, LoaderAleatorio(20_000, 9).filas(None))))
+        for memoria in (50_000, 64 << 20):
+            self.assertEqual(list(map(tuple, self.ordenar(memoria, unico=True))), esperado)
+
+    def test_unico_inverso_con_volcado_a_disco(self):
+        esperado = sorted(set(map(tuple, LoaderAleatorio(20_000, 9).filas(None))), reverse=True)
+        self.assertEqual(list(map(tuple, self.ordenar(50_000, unico=True, reverse=True))),
+                         esperado)
+
+    def test_mezcla_en_varias_pasadas(self):
+        esperado = sorted(LoaderAleatorio(20_000, 9).filas(None), key=lambda fila: fila[0])
+        ordenacion = OrdenacionExterna('aleatorio', LoaderAleatorio(20_000, 9), memoria=20_000)
+        ordenacion.mezcla_maxima = 4
+        ordenacion.transform()
+        self.assertEqual(list(ordenacion.content), esperado)
+
+    def test_resultado_por_flujo(self):
+        # el resultado se recorre sin cargarlo entero: la memoria usada queda muy por debajo
+        # de la que ocuparían todas las filas
+        n = 100_000
+        ordenacion = OrdenacionExterna('aleatorio', LoaderAleatorio(n, 1000), memoria=1 << 20)
+        ordenacion.mezcla_maxima = 8
+        tracemalloc.start()
+        try:
+            ordenacion.transform()
+            filas, anterior = 0, None
+            for fila in ordenacion.content:
+                self.assertTrue(anterior is None or anterior[0] <= fila[0])
+                anterior = fila
+                filas += 1
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(filas, n)
+        total = sum(map(_tamano, LoaderAleatorio(n, 1000).filas(None)))
+        self.assertLess(pico, total / 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from puente_incremental import CSVLoaderIncremental
+
+
+class TestCSVLoaderIncremental(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'datos.csv')
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def escribir(self, texto, modo='a'):
+        with open(self.ruta, modo, newline='') as f:
+            f.write(texto)
+
+    def cargar(self, **opciones):
+        loader = CSVLoaderIncremental(**opciones)
+        filas = list(loader.filas(self.ruta))
+        return filas, loader.recargaCompleta
+
+    def test_solo_filas_nuevas(self):
+        self.escribir('a,b\nc,d\n', 'w')
+        self.assertEqual(self.cargar(), ([['a', 'b'], ['c', 'd']], True))
+        self.assertEqual(self.cargar(), ([], False))
+        self.escribir('e,f\n')
+        self.assertEqual(self.cargar(), ([['e', 'f']], False))
+
+    def test_salto_de_linea_dentro_de_comillas(self):
+        self.escribir('a,"b\nc"\nd,"e\n', 'w')
+        self.assertEqual(self.cargar()[0], [['a', 'b\nc']])
+        self.escribir('f"\n')
+        self.assertEqual(self.cargar()[0], [['d', 'e\nf']])
+
+    def test_comillas_del_dialecto(self):
+        csv.register_dialect('simples', quotechar="'")
+        self.addCleanup(csv.unregister_dialect, 'simples')
+        self.escribir("a,'b\n\"c'\nd,'e\n", 'w')
+        self.assertEqual(self.cargar(dialecto='simples')[0], [['a', 'b\n"c']])
+
+    def test_ultimo_registro_sin_salto_de_linea(self):
+        self.escribir('a,b\nc,d', 'w')
+        # mientras el fichero crece, el final puede estar a medio escribir
+        self.assertEqual(self.cargar()[0], [['a', 'b']])
+        # si no ha crecido desde la carga anterior, el registro está completo
+        self.assertEqual(self.cargar()[0], [['c', 'd']])
+        self.assertEqual(self.cargar()[0], [])
+        # su salto de línea, cuando llega, no se lee como una fila vacía
+        self.escribir('\ne,f\n')
+        self.assertEqual(self.cargar(), ([['e', 'f']], False))
+
+    def test_finalizar(self):
+        self.escribir('a,b\nc,d', 'w')
+        self.assertEqual(self.cargar(finalizar=True)[0], [['a', 'b'], ['c', 'd']])
+
+    def test_truncado(self):
+        self.escribir('a,b\nc,d\n', 'w')
+        self.cargar()
+        self.escribir('x,y\n', 'r+')
+        os.truncate(self.ruta, 4)
+        self.assertEqual(self.cargar(), ([['x', 'y']], True))
+
+    def test_rotado(self):
+        self.escribir('a,b\n', 'w')
+        self.cargar()
+        nuevo = self.ruta + '.nuevo'
+        with open(nuevo, 'w', newline='') as f:
+            f.write('a,b\nc,d\n')
+        os.replace(nuevo, self.ruta)
+        self.assertEqual(self.cargar(), ([['a', 'b'], ['c', 'd']], True))
+
+    def test_ultima_linea_distinta(self):
+        # mismo inodo y tamaño suficiente, pero el contenido ya leído ha cambiado
+        self.escribir('a,b\n', 'w')
+        self.cargar()
+        self.escribir('x,y\nc,d\n', 'r+')
+        self.assertEqual(self.cargar(), ([['x', 'y'], ['c', 'd']], True))
+
+
+if __name__ == '__main__':
+    unittest.main()